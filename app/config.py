@@ -36,19 +36,50 @@ class ExternalAPIConfig:
     tts_api_url: str = "https://api.elevenlabs.io/v1/text-to-speech"
     tts_voice_id: str = "EXAVITQu4vr4xnSDxMaL"
     tts_api_key: Optional[str] = None
+    video_provider: str = "pika"
+    stub_latency: str = "lognormal:20,0.5"
+    stub_failure_rate: float = 0.0
 
 
 @dataclass
 class RuntimeFlags:
     demo_mode: bool = False
     keep_intermediates: bool = False
+    speculative_scripts: int = 0
+    render_profile: str = "standard"
+    editable_runs: bool = False
+    deadline_seconds: float = 0.0
+
+
+@dataclass
+class StorageConfig:
+    quota_mb: float = 2048.0
+    min_free_mb: float = 256.0
+    run_reserve_mb: float = 150.0
+    stale_run_seconds: float = 3600.0
+
+
+@dataclass
+class GovernorConfig:
+    video_api_rps: float = 1.0
+    video_api_concurrency: int = 4
+    tts_rps: float = 2.0
+    tts_concurrency: int = 2
+    ollama_concurrency: int = 2
+    max_encodes: int = max(1, (os.cpu_count() or 2) // 2)
+    max_active_runs: int = 4
+    acquire_timeout: float = 120.0
+    db_path: Optional[Path] = None
 
 
 @dataclass
 class AppSettings:
     external: ExternalAPIConfig = field(default_factory=ExternalAPIConfig)
     runtime: RuntimeFlags = field(default_factory=RuntimeFlags)
+    storage: StorageConfig = field(default_factory=StorageConfig)
+    governor: GovernorConfig = field(default_factory=GovernorConfig)
     output_dir: Path = OUTPUT_DIR
+    template_config: Path = BASE_DIR / "segment_templates.json"
 
 
 def load_settings() -> AppSettings:
@@ -65,13 +96,47 @@ def load_settings() -> AppSettings:
             tts_api_url=os.getenv("TTS_API_URL", "https://api.elevenlabs.io/v1/text-to-speech"),
             tts_voice_id=os.getenv("TTS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL"),
             tts_api_key=os.getenv("TTS_API_KEY"),
+            video_provider=os.getenv("AIVID_VIDEO_PROVIDER", "pika").lower(),
+            stub_latency=os.getenv("AIVID_STUB_LATENCY", "lognormal:20,0.5"),
+            stub_failure_rate=float(os.getenv("AIVID_STUB_FAILURE_RATE", "0")),
         ),
         runtime=RuntimeFlags(
             demo_mode=demo_mode,
             keep_intermediates=keep_intermediates,
+            speculative_scripts=int(os.getenv("AIVID_SPECULATIVE_SCRIPTS", "0")),
+            render_profile=os.getenv("AIVID_RENDER_PROFILE", "standard").lower(),
+            editable_runs=os.getenv("AIVID_EDITABLE_RUNS", "false").lower() in {"1", "true", "yes"},
+            deadline_seconds=float(os.getenv("AIVID_DEADLINE_SECONDS", "0")),
+        ),
+        storage=StorageConfig(
+            quota_mb=float(os.getenv("AIVID_STORAGE_QUOTA_MB", "2048")),
+            min_free_mb=float(os.getenv("AIVID_MIN_FREE_MB", "256")),
+            run_reserve_mb=float(os.getenv("AIVID_RUN_RESERVE_MB", "150")),
+            stale_run_seconds=float(os.getenv("AIVID_STALE_RUN_SECONDS", "3600")),
+        ),
+        governor=GovernorConfig(
+            video_api_rps=float(os.getenv("AIVID_VIDEO_API_RPS", "1")),
+            video_api_concurrency=int(os.getenv("AIVID_VIDEO_API_CONCURRENCY", "4")),
+            tts_rps=float(os.getenv("AIVID_TTS_RPS", "2")),
+            tts_concurrency=int(os.getenv("AIVID_TTS_CONCURRENCY", "2")),
+            ollama_concurrency=int(os.getenv("AIVID_OLLAMA_CONCURRENCY", "2")),
+            max_encodes=int(os.getenv("AIVID_MAX_ENCODES", str(GovernorConfig.max_encodes))),
+            max_active_runs=int(os.getenv("AIVID_MAX_ACTIVE_RUNS", "4")),
+            acquire_timeout=float(os.getenv("AIVID_GOVERNOR_TIMEOUT", "120")),
+            db_path=Path(os.environ["AIVID_GOVERNOR_DB"]).expanduser() if os.getenv("AIVID_GOVERNOR_DB") else None,
         ),
     )
+    template_config = os.getenv("AIVID_TEMPLATE_CONFIG")
+    if template_config:
+        settings.template_config = Path(template_config).expanduser().resolve()
     return settings
 
 
-__all__ = ["AppSettings", "ExternalAPIConfig", "RuntimeFlags", "load_settings"]
+__all__ = [
+    "AppSettings",
+    "ExternalAPIConfig",
+    "GovernorConfig",
+    "RuntimeFlags",
+    "StorageConfig",
+    "load_settings",
+]
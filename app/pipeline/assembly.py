@@ -1,15 +1,44 @@
 from __future__ import annotations
 
+import os
+import shutil
+import time
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 
-from moviepy.editor import AudioFileClip, VideoFileClip
+import numpy as np
+from moviepy.editor import ImageClip
 
 from ..config import AppSettings
+from .deadline import (
+    BURN_COST_FACTOR,
+    DOWNSCALE_COST_FACTOR,
+    FALLBACK_SECONDS,
+    PROFILE_CHECKPOINT,
+    SHOT_CHECKPOINT,
+    Deadline,
+    DeadlineExceeded,
+)
+from .governor import GovernorSaturated, get_governor
+from .manifest import RunManifest
+from .probe import probe_media
+from .profiles import get_profile
 from .schema import ShotPlan
-from .video import generate_clips, merge_clips
-from .audio import generate_voiceover, audio_duration
-from .subtitles import build_subtitle_file, burn_subtitles
+from .providers import generate_clip_jobs, provider_name
+from .segments import TemplateLibrary, splice_segments
+from .video import _create_text_image, load_fitted_clip, merge_clips
+from .audio import audio_duration, generate_voiceover, load_audio, release_audio
+from .subtitles import build_subtitle_file, burn_subtitles, mux_soft_subtitles
+from .timeline import plan_timeline
+
+
+def _publish(source: Path, final_path: Path) -> Path:
+    final_path.unlink(missing_ok=True)
+    try:
+        os.link(source, final_path)
+    except OSError:
+        shutil.copyfile(source, final_path)
+    return final_path
 
 
 def assemble_video(
@@ -19,38 +48,288 @@ def assemble_video(
     settings: AppSettings,
     work_dir: Path,
     final_path: Path,
+    manifest: Optional[RunManifest] = None,
+    deadline: Optional[Deadline] = None,
 ) -> Path:
-    clip_paths = generate_clips(shots, settings, work_dir)
+    """Render the run, reusing any stage whose inputs match ``manifest``.
+
+    Each stage's inputs are hashed (including the hashes of the stages it
+    depends on), so editing captions only re-runs the burn-in, and changing
+    one shot only re-renders that shot and the encodes downstream of it.
+
+    When ``deadline`` falls behind its checkpoints, or the estimated cost of
+    the encodes still ahead exceeds the time left, the render degrades: the
+    draft profile replaces the configured one, shots that have not arrived
+    become text cards, and captions ship as a soft subtitle track instead of
+    being burned in. Each step taken is recorded on ``deadline``; if nothing
+    fits, ``DeadlineExceeded`` is raised before starting a doomed encode.
+    """
+    manifest = manifest or RunManifest(work_dir)
+    deadline = deadline or Deadline()
+    governor = get_governor(settings)
+    profile = get_profile(settings.runtime.render_profile)
+    if profile.name != "draft" and deadline.behind(PROFILE_CHECKPOINT):
+        profile = get_profile("draft")
+        deadline.degrade("draft_profile")
+    library = TemplateLibrary(settings, profile)
+    intros, shots, outros = library.arrange(shots)
+
+    # Narration first: its length bounds every shot request and encode below.
+    def produce_voiceover() -> dict:
+        path = generate_voiceover(script_text, settings, work_dir, deadline)
+        return {"path": path, "duration": audio_duration(path)}
+
+    tts_identity = {
+        "demo": settings.runtime.demo_mode or not settings.external.tts_api_key,
+        "url": settings.external.tts_api_url,
+        "voice": settings.external.tts_voice_id,
+    }
+    with deadline.stage("voiceover"):
+        voiceover = manifest.run_stage("voiceover", {"script": script_text, "tts": tts_identity}, produce_voiceover)
+    voiceover_path: Path = voiceover["path"]
+    voice_duration: float = voiceover["duration"]
+
+    timeline = plan_timeline(shots, voice_duration)
+    provider = provider_name(settings)
+    clip_inputs = [
+        {
+            "prompt": shot.prompt,
+            "description": shot.description,
+            "duration": shot.duration,
+            "provider": provider,
+            "profile": profile.fingerprint,
+        }
+        for shot in timeline
+    ]
+    clip_paths: List[Optional[Path]] = [
+        manifest.lookup(f"clip:{idx}", inputs) for idx, inputs in enumerate(clip_inputs)
+    ]
+    pending = [idx for idx, path in enumerate(clip_paths) if path is None]
+    shot_wait_until = deadline.at(SHOT_CHECKPOINT)
+    if shot_wait_until is not None:
+        # Leave room for the text cards, a draft stitch (possibly downscaling
+        # the shots) and narration, and the fallback card.
+        draft_encodes = 1 + DOWNSCALE_COST_FACTOR
+        reserve = deadline.encode_cost("draft", voice_duration, draft_encodes) + 2 * deadline.card_cost(voice_duration)
+        shot_wait_until = min(shot_wait_until, deadline.at(1.0) - reserve)
+    if pending:
+        with deadline.stage("clips"):
+            jobs = generate_clip_jobs(
+                [timeline[idx] for idx in pending],
+                settings,
+                work_dir,
+                profile,
+                wait_until=shot_wait_until,
+            )
+        substituted = []
+        for idx, job in zip(pending, jobs):
+            inputs = clip_inputs[idx]
+            if job.extra.get("substituted"):
+                # Distinct hash so a later edit retries the real shot.
+                inputs = {**inputs, "substitute": True}
+                substituted.append(str(job.shot.scene_number))
+            clip_paths[idx] = manifest.record(f"clip:{idx}", inputs, job.clip_path)
+        if substituted:
+            deadline.degrade(f"text_cards:{'/'.join(substituted)}")
+
+    soft_subtitles = False
+
+    def make_room(stage: str, inputs: Callable[[], dict], encodes: Callable[[], float]) -> None:
+        """Degrade until the encodes left from ``stage`` on fit in the remaining time.
+
+        Falls back to the draft profile, then to soft subtitles, and raises
+        ``DeadlineExceeded`` when even that will not finish in time.
+        """
+        nonlocal profile, soft_subtitles
+        if not deadline.active or manifest.available(stage, inputs()):
+            return
+
+        def fits() -> bool:
+            # Keep enough back to still ship the fallback card if this overruns.
+            cost = deadline.encode_cost(profile.name, voice_duration, encodes())
+            return deadline.affords(cost + deadline.card_cost(voice_duration))
+
+        if fits():
+            return
+        if profile.name != "draft":
+            profile = get_profile("draft")
+            deadline.degrade("draft_profile")
+            if fits():
+                return
+        if captions and not soft_subtitles:
+            soft_subtitles = True
+            deadline.degrade("soft_subtitles")
+            if fits():
+                return
+        raise DeadlineExceeded(
+            f"{stage} needs ~{deadline.encode_cost(profile.name, voice_duration, encodes()):.0f}s "
+            f"but only {deadline.remaining():.0f}s remain"
+        )
+
+    def burn_pending() -> float:
+        return BURN_COST_FACTOR if captions and not soft_subtitles else 0.0
+
+    def downscale_pending(sources: List[Path]) -> float:
+        """Extra encodes' worth of decoding when ``sources`` exceed the profile frame."""
+        frame = profile.width * profile.height
+        sizes = [probe_media(path).size for path in sources]
+        larger = any(size is not None and size[0] * size[1] > frame for size in sizes)
+        return DOWNSCALE_COST_FACTOR - 1 if larger else 0.0
+
+    def timed_encode(produce: Callable[[], Path], weight: float = 1.0) -> Path:
+        started = time.monotonic()
+        result = produce()
+        deadline.observe_encode(profile.name, time.monotonic() - started, voice_duration * weight)
+        return result
+
     stitched_path = work_dir / "stitched.mp4"
-    merge_clips(clip_paths, stitched_path)
 
-    voiceover_path = generate_voiceover(script_text, settings, work_dir)
-    voice_duration = audio_duration(voiceover_path)
+    def produce_stitched() -> Path:
+        with governor.slot("encode"):
+            return timed_encode(
+                lambda: merge_clips(clip_paths, stitched_path, max_duration=voice_duration, profile=profile),
+                weight=1 + downscale_pending(clip_paths),
+            )
+
+    def stitched_inputs() -> dict:
+        return {
+            "clips": [manifest.digest(f"clip:{idx}") for idx in range(len(timeline))],
+            "duration": voice_duration,
+            "profile": profile.fingerprint,
+        }
+
+    make_room("stitched", stitched_inputs, lambda: 2 + burn_pending() + downscale_pending(clip_paths))
+    with deadline.stage("stitched"):
+        manifest.run_stage("stitched", stitched_inputs(), produce_stitched)
 
-    video = VideoFileClip(stitched_path.as_posix())
-    audio = AudioFileClip(voiceover_path.as_posix())
     narrated_path = work_dir / "narrated.mp4"
-    try:
-        video_with_audio = video.set_audio(audio)
-        video_with_audio.write_videofile(
-            narrated_path.as_posix(),
-            fps=24,
-            codec="libx264",
-            audio_codec="aac",
-            verbose=False,
-            logger=None,
-        )
-    finally:
-        video.close()
-        audio.close()
-        if 'video_with_audio' in locals():
-            video_with_audio.close()
+
+    def produce_narrated() -> Path:
+        # The profile may have dropped to draft after the stitch was encoded.
+        video = load_fitted_clip(stitched_path, profile.size)
+        audio = load_audio(voiceover_path).to_clip(channels=profile.audio_channels)
+        try:
+            video_with_audio = video.set_audio(audio).set_duration(min(video.duration, voice_duration))
+            with governor.slot("encode"):
+                timed_encode(
+                    lambda: video_with_audio.write_videofile(narrated_path.as_posix(), **profile.write_kwargs()),
+                    weight=1 + downscale_pending([stitched_path]),
+                )
+        finally:
+            video.close()
+            audio.close()
+            if 'video_with_audio' in locals():
+                video_with_audio.close()
+            release_audio(voiceover_path)
+        return narrated_path
+
+    def narrated_inputs() -> dict:
+        return {
+            "stitched": manifest.digest("stitched"),
+            "voiceover": manifest.digest("voiceover"),
+            "profile": profile.fingerprint,
+        }
+
+    make_room("narrated", narrated_inputs, lambda: 1 + burn_pending() + downscale_pending([stitched_path]))
+    with deadline.stage("narrated"):
+        manifest.run_stage("narrated", narrated_inputs(), produce_narrated)
 
     subtitle_path = work_dir / "captions.srt"
-    build_subtitle_file(captions, voice_duration, subtitle_path)
+    manifest.run_stage(
+        "subtitles",
+        {"captions": captions, "duration": voice_duration},
+        lambda: build_subtitle_file(captions, voice_duration, subtitle_path),
+    )
+
+    burned_path = narrated_path
+    if captions and not soft_subtitles:
+
+        def produce_burned() -> Path:
+            with governor.slot("encode"):
+                return timed_encode(
+                    lambda: burn_subtitles(narrated_path, captions, voice_duration, work_dir / "burned.mp4", profile),
+                    weight=BURN_COST_FACTOR + downscale_pending([narrated_path]),
+                )
+
+        def burned_inputs() -> dict:
+            return {
+                "narrated": manifest.digest("narrated"),
+                "captions": captions,
+                "duration": voice_duration,
+                "profile": profile.fingerprint,
+            }
 
-    burn_subtitles(narrated_path, captions, voice_duration, final_path)
+        # Only the burn is left; make_room can at most switch it to soft subtitles.
+        def burn_encodes() -> float:
+            return burn_pending() + downscale_pending([narrated_path]) if burn_pending() else 0.0
+
+        make_room("burned", burned_inputs, burn_encodes)
+        if not soft_subtitles:
+            with deadline.stage("burned"):
+                burned_path = manifest.run_stage("burned", burned_inputs(), produce_burned)
+
+    manifest.save()
+    library = TemplateLibrary(settings, profile)  # the profile may have changed above
+    if not (intros or outros):
+        if soft_subtitles:
+            return mux_soft_subtitles(narrated_path, subtitle_path, final_path)
+        return _publish(burned_path, final_path)
+    intro_paths = [library.segment(t) for t in intros]
+    segments = intro_paths + [burned_path] + [library.segment(t) for t in outros]
+    if not soft_subtitles:
+        return splice_segments(segments, final_path)
+    # The concat demuxer takes its streams from the first input, so the
+    # subtitle track is added after splicing, shifted past the intros.
+    spliced_path = splice_segments(segments, work_dir / "spliced.mp4")
+    offset = sum(probe_media(path).duration for path in intro_paths)
+    return mux_soft_subtitles(spliced_path, subtitle_path, final_path, offset=offset)
+
+
+def assemble_fallback(
+    title: str,
+    settings: AppSettings,
+    final_path: Path,
+    voiceover_path: Optional[Path] = None,
+    deadline: Optional[Deadline] = None,
+) -> Path:
+    """Last-resort render for a run out of time: one draft-profile text card,
+    narrated when a finished voiceover is available.
+
+    With ``deadline``, the wait for an ``encode`` slot is cut to the time left;
+    if none frees up by then the card is encoded over the cap, since it is
+    cheap and the alternative is returning no video at all.
+    """
+    deadline = deadline or Deadline()
+    governor = get_governor(settings)
+    profile = get_profile("draft")
+    card = ImageClip(np.array(_create_text_image(title, profile.size)))
+    audio = None
+    try:
+        if voiceover_path is not None:
+            audio = load_audio(voiceover_path).to_clip(channels=profile.audio_channels)
+            card = card.set_duration(audio.duration).set_audio(audio)
+        else:
+            card = card.set_duration(FALLBACK_SECONDS)
+        wait = None
+        if deadline.active:
+            wait = max(0.0, deadline.remaining() - deadline.card_cost(card.duration))
+        try:
+            lease_id: Optional[str] = governor.acquire("encode", timeout=wait)
+        except GovernorSaturated:
+            if not deadline.active:
+                raise
+            lease_id = None
+        try:
+            card.write_videofile(final_path.as_posix(), **profile.write_kwargs(audio=audio is not None))
+        finally:
+            if lease_id is not None:
+                governor.release(lease_id)
+    finally:
+        card.close()
+        if audio is not None:
+            audio.close()
+            release_audio(voiceover_path)
     return final_path
 
 
-__all__ = ["assemble_video"]
+__all__ = ["assemble_fallback", "assemble_video"]
@@ -1,21 +1,30 @@
 from __future__ import annotations
 
+import subprocess
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import requests
-from moviepy.audio.io.AudioFileClip import AudioFileClip
+from moviepy.audio.AudioClip import AudioArrayClip
+from moviepy.config import get_setting
 from scipy.io import wavfile
 
 from ..config import AppSettings
+from .deadline import Deadline
+from .governor import get_governor
+from .probe import probe_media
 
 
 class AudioGenerationError(RuntimeError):
     """Raised when voice generation fails."""
 
 
-def _call_tts_api(text: str, settings: AppSettings, output_path: Path) -> Path:
+def _call_tts_api(
+    text: str, settings: AppSettings, output_path: Path, deadline: Optional[Deadline] = None
+) -> Path:
     url = f"{settings.external.tts_api_url}/{settings.external.tts_voice_id}"
     payload = {
         "text": text,
@@ -26,7 +35,14 @@ def _call_tts_api(text: str, settings: AppSettings, output_path: Path) -> Path:
         "xi-api-key": settings.external.tts_api_key,
         "Content-Type": "application/json",
     }
-    response = requests.post(url, json=payload, headers=headers, timeout=120)
+    timeout: float = 120
+    wait = None
+    if deadline is not None:
+        wait = timeout = deadline.cap_timeout(timeout)
+    with get_governor(settings).slot("tts", timeout=wait):
+        if deadline is not None:
+            timeout = deadline.cap_timeout(timeout)
+        response = requests.post(url, json=payload, headers=headers, timeout=timeout)
     response.raise_for_status()
     output_path.write_bytes(response.content)
     return output_path
@@ -57,7 +73,9 @@ def _generate_demo_audio(text: str, output_path: Path) -> Path:
         return output_path
 
 
-def generate_voiceover(text: str, settings: AppSettings, work_dir: Path) -> Path:
+def generate_voiceover(
+    text: str, settings: AppSettings, work_dir: Path, deadline: Optional[Deadline] = None
+) -> Path:
     output_dir = work_dir / "audio"
     output_dir.mkdir(parents=True, exist_ok=True)
     output_path = output_dir / "voiceover.wav"
@@ -65,15 +83,108 @@ def generate_voiceover(text: str, settings: AppSettings, work_dir: Path) -> Path
     if settings.runtime.demo_mode or not settings.external.tts_api_key:
         return _generate_demo_audio(text, output_path)
 
-    return _call_tts_api(text, settings, output_path)
+    return _call_tts_api(text, settings, output_path, deadline)
 
 
 def audio_duration(audio_path: Path) -> float:
-    clip = AudioFileClip(audio_path.as_posix())
-    try:
-        return clip.duration
-    finally:
-        clip.close()
-
+    return probe_media(audio_path).duration
+
+
+@dataclass(frozen=True)
+class AudioBuffer:
+    """Decoded PCM held in memory as float32 samples shaped ``(frames, channels)``."""
+
+    samples: np.ndarray
+    sample_rate: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def to_clip(self, channels: Optional[int] = None) -> AudioArrayClip:
+        """Wrap the buffer as a clip, up- or down-mixing to ``channels`` if given."""
+        samples = self.samples
+        if channels and samples.shape[1] != channels:
+            mono = samples.mean(axis=1, keepdims=True)
+            samples = np.repeat(mono, channels, axis=1)
+        return AudioArrayClip(samples, fps=self.sample_rate)
+
+
+_BUFFERS: Dict[str, Tuple[Tuple[int, int], AudioBuffer]] = {}
+_BUFFER_LOCK = threading.Lock()
+
+
+def _normalize_pcm(data: np.ndarray) -> np.ndarray:
+    if data.dtype == np.uint8:
+        data = (data.astype(np.float32) - 128.0) / 128.0
+    elif np.issubdtype(data.dtype, np.integer):
+        data = data.astype(np.float32) / float(np.iinfo(data.dtype).max + 1)
+    else:
+        data = data.astype(np.float32, copy=False)
+    return data.reshape(len(data), -1)
+
+
+def _decode_with_ffmpeg(audio_path: Path) -> AudioBuffer:
+    info = probe_media(audio_path)
+    sample_rate = info.sample_rate or 44100
+    channels = info.channels or 2
+    result = subprocess.run(
+        [
+            get_setting("FFMPEG_BINARY"),
+            "-v", "error",
+            "-i", audio_path.as_posix(),
+            "-f", "f32le",
+            "-acodec", "pcm_f32le",
+            "-ac", str(channels),
+            "-ar", str(sample_rate),
+            "-",
+        ],
+        capture_output=True,
+        check=True,
+    )
+    samples = np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, channels)
+    return AudioBuffer(samples=samples, sample_rate=sample_rate)
+
+
+def load_audio(audio_path: Path) -> AudioBuffer:
+    """Decode ``audio_path`` once and share the buffer until the file changes.
+
+    WAV files are read directly; anything else (e.g. MP3 bytes returned by a
+    TTS API) is decoded with a single ffmpeg call.
+    """
+    stat = audio_path.stat()
+    key = audio_path.resolve().as_posix()
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _BUFFER_LOCK:
+        cached = _BUFFERS.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
 
-__all__ = ["generate_voiceover", "audio_duration", "AudioGenerationError"]
+    try:
+        if (probe_media(audio_path).codec or "").startswith("pcm"):
+            sample_rate, data = wavfile.read(audio_path.as_posix())
+            buffer = AudioBuffer(samples=_normalize_pcm(data), sample_rate=sample_rate)
+        else:
+            buffer = _decode_with_ffmpeg(audio_path)
+    except (OSError, ValueError, subprocess.SubprocessError) as exc:
+        raise AudioGenerationError(f"Could not decode {audio_path}") from exc
+    buffer.samples.setflags(write=False)
+
+    with _BUFFER_LOCK:
+        _BUFFERS[key] = (version, buffer)
+    return buffer
+
+
+def release_audio(audio_path: Path) -> None:
+    with _BUFFER_LOCK:
+        _BUFFERS.pop(audio_path.resolve().as_posix(), None)
+
+
+__all__ = [
+    "AudioBuffer",
+    "AudioGenerationError",
+    "audio_duration",
+    "generate_voiceover",
+    "load_audio",
+    "release_audio",
+]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Fractions of the budget by which each phase should be finished. Falling
+# behind a checkpoint triggers the matching degradation.
+PROFILE_CHECKPOINT = 0.35
+SHOT_CHECKPOINT = 0.6
+
+# Wall seconds per second of output for one full-frame encode on a single
+# core, by profile. Scaled by how fast the run's own encodes turn out to be.
+ENCODE_SECONDS_PER_SECOND = {"standard": 1.2, "draft": 0.3}
+# Static text cards compress to almost nothing and encode about twice as fast,
+# but starting the encoder still takes a fixed half second or so.
+CARD_COST_FACTOR = 0.5
+CARD_STARTUP_SECONDS = 0.5
+# Burning in captions composites overlays onto every frame on top of the encode.
+BURN_COST_FACTOR = 2.0
+# Decoding sources larger than the output frame (e.g. standard clips for a
+# draft encode) costs about as much again as the draft encode itself.
+DOWNSCALE_COST_FACTOR = 2.0
+
+# Length of the last-resort text card when no narration is available yet.
+FALLBACK_SECONDS = 5.0
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when even the cheapest remaining render cannot finish in time."""
+
+
+class Deadline:
+    """Tracks a run's time budget, per-stage timings and applied degradations.
+
+    ``Deadline(None)`` never expires, so callers can thread one through
+    unconditionally.
+    """
+
+    def __init__(self, budget_s: Optional[float] = None) -> None:
+        self.budget_s = budget_s if budget_s and budget_s > 0 else None
+        self.started = time.monotonic()
+        self.stage_seconds: Dict[str, float] = {}
+        self.degradations: List[str] = []
+        self.encode_scale = 1.0
+
+    @property
+    def active(self) -> bool:
+        return self.budget_s is not None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        if self.budget_s is None:
+            return math.inf
+        return self.budget_s - self.elapsed()
+
+    def at(self, fraction: float) -> Optional[float]:
+        """Monotonic timestamp of a checkpoint, or ``None`` without a budget."""
+        if self.budget_s is None:
+            return None
+        return self.started + self.budget_s * fraction
+
+    def encode_cost(self, profile_name: str, media_seconds: float, encodes: float = 1.0) -> float:
+        """Estimated wall seconds for ``encodes`` encodes of ``media_seconds`` of video."""
+        rate = ENCODE_SECONDS_PER_SECOND.get(profile_name, max(ENCODE_SECONDS_PER_SECOND.values()))
+        return rate * self.encode_scale * media_seconds * encodes
+
+    def card_cost(self, media_seconds: float) -> float:
+        """Estimated wall seconds for draft text cards covering ``media_seconds``."""
+        return self.encode_cost("draft", media_seconds) * CARD_COST_FACTOR + CARD_STARTUP_SECONDS
+
+    def observe_encode(self, profile_name: str, seconds: float, media_seconds: float) -> None:
+        """Calibrate ``encode_cost`` from an encode that just finished."""
+        prior = ENCODE_SECONDS_PER_SECOND.get(profile_name)
+        if prior and media_seconds > 0:
+            self.encode_scale = seconds / (prior * media_seconds)
+
+    def cap_timeout(self, timeout: float) -> float:
+        """Cut ``timeout`` so a call that uses all of it still leaves time for the fallback card.
+
+        Raises ``DeadlineExceeded`` when there is no time left to wait at all.
+        """
+        left = self.remaining() - self.card_cost(FALLBACK_SECONDS)
+        if left <= 0:
+            raise DeadlineExceeded("No time left in the budget")
+        return min(timeout, left)
+
+    def affords(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def behind(self, fraction: float) -> bool:
+        return self.budget_s is not None and self.elapsed() > self.budget_s * fraction
+
+    def degrade(self, name: str) -> None:
+        self.degradations.append(name)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + time.monotonic() - started
+
+    def as_metadata(self) -> Dict[str, str]:
+        metadata = {
+            "elapsed_s": f"{self.elapsed():.2f}",
+            "stage_seconds": json.dumps({k: round(v, 2) for k, v in self.stage_seconds.items()}),
+        }
+        if self.budget_s is not None:
+            metadata["deadline_s"] = f"{self.budget_s:.1f}"
+            metadata["degradations"] = ", ".join(self.degradations) or "none"
+        return metadata
+
+
+__all__ = [
+    "BURN_COST_FACTOR",
+    "CARD_COST_FACTOR",
+    "CARD_STARTUP_SECONDS",
+    "DOWNSCALE_COST_FACTOR",
+    "Deadline",
+    "DeadlineExceeded",
+    "ENCODE_SECONDS_PER_SECOND",
+    "FALLBACK_SECONDS",
+    "PROFILE_CHECKPOINT",
+    "SHOT_CHECKPOINT",
+]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from dataclasses import asdict, replace
+from typing import Any, Dict
+
+from .schema import ConceptCandidate, PlanPatch, ScriptPlan, ShotPlan
+
+SHOT_FIELDS = {"description", "duration", "prompt"}
+
+
+class EditError(ValueError):
+    """Raised when a patch cannot be applied to a previous run."""
+
+
+def plan_to_dict(plan: ScriptPlan) -> Dict[str, Any]:
+    return asdict(plan)
+
+
+def plan_from_dict(data: Dict[str, Any]) -> ScriptPlan:
+    return ScriptPlan(
+        final_concept=ConceptCandidate(**data["final_concept"]),
+        script_text=data["script_text"],
+        shots=[ShotPlan(**shot) for shot in data["shots"]],
+        captions=list(data["captions"]),
+    )
+
+
+def patch_from_dict(data: Dict[str, Any]) -> PlanPatch:
+    shots = {int(scene): dict(fields) for scene, fields in (data.get("shots") or {}).items()}
+    captions = data.get("captions")
+    return PlanPatch(
+        script_text=data.get("script_text"),
+        captions=[str(caption) for caption in captions] if captions is not None else None,
+        shots=shots,
+    )
+
+
+def apply_patch(plan: ScriptPlan, patch: PlanPatch) -> ScriptPlan:
+    known = {shot.scene_number for shot in plan.shots}
+    unknown = set(patch.shots) - known
+    if unknown:
+        raise EditError(f"Unknown scene numbers: {sorted(unknown)}")
+
+    shots = []
+    for shot in plan.shots:
+        overrides = patch.shots.get(shot.scene_number, {})
+        invalid = set(overrides) - SHOT_FIELDS
+        if invalid:
+            raise EditError(f"Cannot edit shot fields: {sorted(invalid)}")
+        if "duration" in overrides:
+            overrides = {**overrides, "duration": float(overrides["duration"])}
+        shots.append(replace(shot, **overrides))
+
+    return replace(
+        plan,
+        script_text=patch.script_text if patch.script_text is not None else plan.script_text,
+        captions=patch.captions if patch.captions is not None else plan.captions,
+        shots=shots,
+    )
+
+
+__all__ = ["EditError", "apply_patch", "patch_from_dict", "plan_from_dict", "plan_to_dict"]
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import os
+import random
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..config import AppSettings
+from .process import owner_alive, process_token
+
+DB_NAME = ".governor.sqlite3"
+LEASE_SECONDS = 900.0
+POLL_INTERVAL = 0.25
+# Weight of the newest sample in the running mean of how long leases are held.
+HOLD_SMOOTHING = 0.2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    id TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    owner TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS leases_resource ON leases (resource);
+CREATE TABLE IF NOT EXISTS buckets (
+    resource TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS holds (
+    resource TEXT PRIMARY KEY,
+    mean REAL NOT NULL
+);
+"""
+
+_GOVERNORS: Dict[Path, "Governor"] = {}
+
+
+class GovernorSaturated(RuntimeError):
+    """Raised when a resource stays saturated past the caller's wait budget."""
+
+    def __init__(self, resource: str, retry_after: float) -> None:
+        super().__init__(f"{resource} is saturated; retry in {retry_after:.0f}s")
+        self.resource = resource
+        self.retry_after = retry_after
+
+
+class AdmissionRejected(GovernorSaturated):
+    """Raised when a new run is turned away because every run slot is taken.
+
+    Unlike saturation of a stage's resource mid-run, this happens before any
+    work is done, so it is the one case clients should simply retry.
+    """
+
+
+class Governor:
+    """Cross-process token buckets and semaphores backed by a SQLite file.
+
+    Every process that points at the same database shares the same limits, so
+    Flask workers and warm function instances on one host coordinate their use
+    of external APIs and CPU-heavy encodes. The database runs in WAL mode and
+    must live on a local filesystem; it cannot coordinate separate hosts.
+
+    Leases record their owner's pid and start time, so those held by processes
+    that died are reclaimed on the next acquire even if the pid was reused;
+    leases that outlive ``LEASE_SECONDS`` are treated as leaked.
+    """
+
+    def __init__(self, settings: AppSettings) -> None:
+        config = settings.governor
+        self.db_path = config.db_path or settings.output_dir / DB_NAME
+        self.acquire_timeout = config.acquire_timeout
+        self.host = socket.gethostname()
+        # resource -> (requests per second, max concurrent); 0 disables a limit
+        self.limits: Dict[str, Tuple[float, int]] = {
+            "video_api": (config.video_api_rps, config.video_api_concurrency),
+            "tts": (config.tts_rps, config.tts_concurrency),
+            "ollama": (0.0, config.ollama_concurrency),
+            "encode": (0.0, config.max_encodes),
+            "runs": (0.0, config.max_active_runs),
+        }
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(leases)")}
+            if "owner" not in columns:
+                # Databases created before leases recorded the owner's start time.
+                conn.execute("ALTER TABLE leases ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path.as_posix(), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _reap(self, conn: sqlite3.Connection, resource: str, now: float) -> None:
+        rows = conn.execute(
+            "SELECT id, host, pid, owner, expires FROM leases WHERE resource = ?", (resource,)
+        ).fetchall()
+        for lease_id, host, pid, owner, expires in rows:
+            dead = host == self.host and not owner_alive(owner or str(pid))
+            if dead or expires < now:
+                conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+    def _try_acquire(self, resource: str) -> Tuple[Optional[str], float]:
+        """Attempt one acquisition; return the lease id or the suggested wait."""
+        rate, concurrency = self.limits.get(resource, (0.0, 0))
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            if concurrency > 0:
+                self._reap(conn, resource, now)
+                (held,) = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE resource = ?", (resource,)
+                ).fetchone()
+                if held >= concurrency:
+                    conn.execute("ROLLBACK")
+                    return None, POLL_INTERVAL
+
+            if rate > 0:
+                capacity = max(1.0, rate)
+                row = conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE resource = ?", (resource,)
+                ).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens = min(capacity, tokens + (now - updated) * rate)
+                if tokens < 1.0:
+                    conn.execute("ROLLBACK")
+                    return None, (1.0 - tokens) / rate
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (resource, tokens, updated) VALUES (?, ?, ?)",
+                    (resource, tokens - 1.0, now),
+                )
+
+            lease_id = uuid.uuid4().hex
+            if concurrency > 0:
+                conn.execute(
+                    "INSERT INTO leases (id, resource, host, pid, owner, expires) VALUES (?, ?, ?, ?, ?, ?)",
+                    (lease_id, resource, self.host, os.getpid(), process_token(), now + LEASE_SECONDS),
+                )
+            conn.execute("COMMIT")
+            return lease_id, 0.0
+        finally:
+            conn.close()
+
+    def acquire(self, resource: str, timeout: Optional[float] = None) -> str:
+        """Block until ``resource`` is available or raise :class:`GovernorSaturated`.
+
+        ``timeout=0`` makes a single non-blocking attempt, which the web layer
+        uses to shed load quickly.
+        """
+        budget = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + budget
+        while True:
+            lease_id, wait = self._try_acquire(resource)
+            if lease_id is not None:
+                return lease_id
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise GovernorSaturated(resource, self.retry_after(resource, wait))
+            time.sleep(min(remaining, max(POLL_INTERVAL, wait) * random.uniform(0.8, 1.2)))
+
+    def retry_after(self, resource: str, wait: float = 0.0) -> float:
+        """Seconds until ``resource`` is likely to free up.
+
+        For a full semaphore this is the typical hold time minus the age of
+        the oldest lease, or that lease's age when nothing has been released
+        yet. Rate-limited resources report the bucket's own ``wait``.
+        """
+        _, concurrency = self.limits.get(resource, (0.0, 0))
+        if concurrency <= 0:
+            return max(1.0, wait)
+        conn = self._connect()
+        try:
+            (oldest,) = conn.execute(
+                "SELECT MIN(expires) FROM leases WHERE resource = ?", (resource,)
+            ).fetchone()
+            row = conn.execute("SELECT mean FROM holds WHERE resource = ?", (resource,)).fetchone()
+        finally:
+            conn.close()
+        if oldest is None:
+            return max(1.0, wait)
+        age = max(0.0, time.time() - (oldest - LEASE_SECONDS))
+        expected = row[0] - age if row else age
+        return max(1.0, wait, expected)
+
+    def release(self, lease_id: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT resource, expires FROM leases WHERE id = ?", (lease_id,)).fetchone()
+            conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+            if row:
+                resource, expires = row
+                held = max(0.0, time.time() - (expires - LEASE_SECONDS))
+                conn.execute(
+                    "INSERT INTO holds (resource, mean) VALUES (?, ?) "
+                    "ON CONFLICT(resource) DO UPDATE SET mean = mean + ? * (excluded.mean - mean)",
+                    (resource, held, HOLD_SMOOTHING),
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @contextmanager
+    def slot(self, resource: str, timeout: Optional[float] = None) -> Iterator[None]:
+        lease_id = self.acquire(resource, timeout)
+        try:
+            yield
+        finally:
+            self.release(lease_id)
+
+
+def get_governor(settings: AppSettings) -> Governor:
+    """Return the process-wide governor for the configured database."""
+    db_path = (settings.governor.db_path or settings.output_dir / DB_NAME).resolve()
+    governor = _GOVERNORS.get(db_path)
+    if governor is None:
+        governor = _GOVERNORS[db_path] = Governor(settings)
+    return governor
+
+
+__all__ = ["AdmissionRejected", "Governor", "GovernorSaturated", "get_governor"]
@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-import json
 import random
-from typing import List, Tuple
-
-import requests
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..config import AppSettings
+from .deadline import Deadline
+from .llm import LLMUsage, chat_json, coerce_list
 from .schema import ConceptCandidate
 
 SYSTEM_PROMPT = (
@@ -17,9 +16,30 @@ SYSTEM_PROMPT = (
 
 IDEA_PROMPT = """
 Topic: {topic}
-Respond with JSON array of objects using keys angle, hook, score.
+Respond with a JSON object whose "angles" key is an array of objects using keys angle, hook, score.
 """
 
+ANGLES_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "angles": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "angle": {"type": "string"},
+                    "hook": {"type": "string"},
+                    "score": {"type": "number"},
+                },
+                "required": ["angle", "hook", "score"],
+            },
+        }
+    },
+    "required": ["angles"],
+}
+
+MAX_ATTEMPTS = 2
+
 
 DEMO_ANGLES = [
     ("Unexpected transformation", "Watch this {topic} idea come alive in 20 seconds", 82.0),
@@ -28,55 +48,51 @@ DEMO_ANGLES = [
 ]
 
 
-def _extract_json_payload(text: str) -> dict:
-    cleaned = text.strip()
-    if cleaned.startswith("```"):
-        cleaned = "\n".join(
-            line for line in cleaned.splitlines() if not line.strip().startswith("```")
-        ).strip()
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError as exc:
-        raise ValueError("Failed to parse JSON from Ollama response") from exc
-
-
-def _call_ollama(topic: str, settings: AppSettings) -> List[ConceptCandidate]:
-    payload = {
-        "model": settings.external.ollama_model,
-        "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT + " Respond strictly in JSON."},
-            {"role": "user", "content": IDEA_PROMPT.format(topic=topic)},
-        ],
-        "stream": False,
-    }
-
-    base_url = settings.external.ollama_base_url.rstrip("/")
-    response = requests.post(
-        f"{base_url}/api/chat",
-        json=payload,
-        timeout=90,
-    )
-    response.raise_for_status()
-    data = response.json()
-    text = data.get("message", {}).get("content", "").strip()
-    if not text:
-        raise ValueError("Ollama response did not include content")
-
-    parsed = _extract_json_payload(text)
-    candidates = [
-        ConceptCandidate(
-            angle=item["angle"],
-            hook=item["hook"],
-            score=float(item.get("score", 0)),
+def _parse_candidates(parsed: Any) -> List[ConceptCandidate]:
+    candidates = []
+    for item in coerce_list(parsed, "angles"):
+        if not isinstance(item, dict) or not item.get("angle"):
+            continue
+        try:
+            score = float(item.get("score", 0))
+        except (TypeError, ValueError):
+            score = 0.0
+        candidates.append(
+            ConceptCandidate(angle=str(item["angle"]), hook=str(item.get("hook", "")), score=score)
         )
-        for item in parsed.get("angles", [])
-    ]
-    if not candidates:
-        raise ValueError("Model did not return any angles")
     return candidates
 
 
-def generate_concepts(topic: str, settings: AppSettings) -> List[ConceptCandidate]:
+def _call_ollama(
+    topic: str,
+    settings: AppSettings,
+    usage: Optional[LLMUsage] = None,
+    deadline: Optional[Deadline] = None,
+) -> List[ConceptCandidate]:
+    usage = usage or LLMUsage()
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT + " Respond strictly in JSON."},
+        {"role": "user", "content": IDEA_PROMPT.format(topic=topic)},
+    ]
+    error: Exception = ValueError("Model did not return any angles")
+    for _attempt in range(MAX_ATTEMPTS):
+        try:
+            candidates = _parse_candidates(chat_json(settings, messages, ANGLES_SCHEMA, 90, usage, deadline))
+        except ValueError as exc:
+            error = exc
+            candidates = []
+        if candidates:
+            return candidates
+        usage.add(wasted_calls=1)
+    raise error
+
+
+def generate_concepts(
+    topic: str,
+    settings: AppSettings,
+    usage: Optional[LLMUsage] = None,
+    deadline: Optional[Deadline] = None,
+) -> List[ConceptCandidate]:
     if settings.runtime.demo_mode or not settings.external.ollama_model:
         rng = random.Random(hash(topic) & 0xFFFFFFFF)
         return [
@@ -84,7 +100,7 @@ def generate_concepts(topic: str, settings: AppSettings) -> List[ConceptCandidat
             for angle, hook, score in DEMO_ANGLES
         ]
 
-    return _call_ollama(topic, settings)
+    return _call_ollama(topic, settings, usage, deadline)
 
 
 def choose_best_concept(candidates: List[ConceptCandidate]) -> ConceptCandidate:
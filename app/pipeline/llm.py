@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from ..config import AppSettings
+from .deadline import Deadline
+from .governor import get_governor
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+# Characters that may open a string. Models sometimes emit curly quotes as
+# delimiters; inside a string they are ordinary text.
+_STRING_QUOTES = '"“”'
+
+
+@dataclass
+class LLMUsage:
+    """Counts LLM calls for one run; shared across threads."""
+
+    calls: int = 0
+    wasted_calls: int = 0
+    followup_calls: int = 0
+    local_repairs: int = 0
+    seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counts: float) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def merge(self, other: "LLMUsage", wasted: bool = False) -> None:
+        """Add a snapshot of ``other``'s counts; with ``wasted`` all its calls count as wasted."""
+        with other._lock:
+            calls, wasted_calls = other.calls, other.wasted_calls
+            followup_calls, local_repairs, seconds = other.followup_calls, other.local_repairs, other.seconds
+        self.add(
+            calls=calls,
+            wasted_calls=calls if wasted else wasted_calls,
+            followup_calls=followup_calls,
+            local_repairs=local_repairs,
+            seconds=seconds,
+        )
+
+    def as_metadata(self) -> Dict[str, str]:
+        return {
+            "llm_calls": str(self.calls),
+            "llm_wasted_calls": str(self.wasted_calls),
+            "llm_followup_calls": str(self.followup_calls),
+            "llm_local_repairs": str(self.local_repairs),
+            "llm_seconds": f"{self.seconds:.2f}",
+        }
+
+
+def _scan(text: str, start: int = 0) -> Iterator[Tuple[int, str, str]]:
+    """Yield ``(index, char, kind)`` for ``text`` from ``start``, tracking strings.
+
+    ``kind`` is ``"code"`` outside strings, ``"quote"`` for a string delimiter,
+    ``"escape"`` for a backslash that escapes the next character and
+    ``"string"`` for any other string content. A string opened by a straight
+    quote only closes on a straight quote.
+    """
+    closers = ""
+    escaped = False
+    for idx in range(start, len(text)):
+        ch = text[idx]
+        if not closers:
+            if ch in _STRING_QUOTES:
+                closers = '"' if ch == '"' else _STRING_QUOTES
+                yield idx, ch, "quote"
+            else:
+                yield idx, ch, "code"
+        elif escaped:
+            escaped = False
+            yield idx, ch, "string"
+        elif ch == "\\":
+            escaped = True
+            yield idx, ch, "escape"
+        elif ch in closers:
+            closers = ""
+            yield idx, ch, "quote"
+        else:
+            yield idx, ch, "string"
+
+
+def _balanced_span(text: str) -> str:
+    """Cut ``text`` down to the first complete JSON object or array it contains.
+
+    A truncated reply has its open string and brackets closed instead.
+    Brackets inside string literals are ignored throughout.
+    """
+    start = next((idx for idx, ch in enumerate(text) if ch in "[{"), None)
+    if start is None:
+        return text
+    closers: List[str] = []
+    in_string = False
+    kind = "code"
+    for idx, ch, kind in _scan(text, start):
+        if kind == "quote":
+            in_string = not in_string
+        elif kind != "code":
+            continue
+        elif ch in "[{":
+            closers.append("]" if ch == "[" else "}")
+        elif ch in "]}":
+            if closers:
+                closers.pop()
+            if not closers:
+                return text[start : idx + 1]
+    tail = text[start:]
+    if in_string:
+        tail = (tail[:-1] if kind == "escape" else tail) + '"'
+    return tail + "".join(reversed(closers))
+
+
+def _repair_delimiters(text: str) -> str:
+    """Straighten curly quotes used as delimiters and drop trailing commas.
+
+    String contents are left untouched.
+    """
+    out: List[str] = []
+    for _, ch, kind in _scan(text):
+        if kind == "quote":
+            out.append('"')
+            continue
+        if kind == "code" and ch in "]}":
+            end = len(out)
+            while end and out[end - 1].isspace():
+                end -= 1
+            if end and out[end - 1] == ",":
+                del out[end - 1]
+        out.append(ch)
+    return "".join(out)
+
+
+def parse_json(text: str, usage: Optional[LLMUsage] = None) -> Any:
+    """Parse model output, repairing common defects locally before giving up.
+
+    Handles code fences, prose around the payload, smart quotes, trailing
+    commas and truncated closing brackets.
+    """
+    cleaned = _FENCE.sub("", text.strip()).strip()
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+
+    repaired = _repair_delimiters(_balanced_span(cleaned))
+    try:
+        parsed = json.loads(repaired)
+    except json.JSONDecodeError as exc:
+        raise ValueError("Failed to parse JSON from Ollama response") from exc
+    if usage is not None:
+        usage.add(local_repairs=1)
+    return parsed
+
+
+def coerce_list(parsed: Any, key: str) -> List[Any]:
+    """Accept a bare array, ``{key: [...]}``, any single-array wrapper, or one object."""
+    if isinstance(parsed, list):
+        return parsed
+    if isinstance(parsed, dict):
+        if isinstance(parsed.get(key), list):
+            return parsed[key]
+        arrays = [value for value in parsed.values() if isinstance(value, list)]
+        if len(arrays) == 1:
+            return arrays[0]
+        if parsed:
+            return [parsed]
+    return []
+
+
+def chat_json(
+    settings: AppSettings,
+    messages: List[Dict[str, str]],
+    schema: Dict[str, Any],
+    timeout: float,
+    usage: Optional[LLMUsage] = None,
+    deadline: Optional[Deadline] = None,
+) -> Any:
+    """Run one Ollama chat constrained to ``schema`` and return the parsed JSON.
+
+    With ``deadline``, both the wait for an ``ollama`` slot and the request
+    are cut to the time left in the run's budget.
+    """
+    payload = {
+        "model": settings.external.ollama_model,
+        "messages": messages,
+        "format": schema,
+        "stream": False,
+    }
+    base_url = settings.external.ollama_base_url.rstrip("/")
+    wait = None
+    if deadline is not None:
+        wait = timeout = deadline.cap_timeout(timeout)
+    started = time.perf_counter()
+    try:
+        with get_governor(settings).slot("ollama", timeout=wait):
+            if deadline is not None:
+                timeout = deadline.cap_timeout(timeout)
+            response = requests.post(f"{base_url}/api/chat", json=payload, timeout=timeout)
+        response.raise_for_status()
+    finally:
+        if usage is not None:
+            usage.add(calls=1, seconds=time.perf_counter() - started)
+    text = response.json().get("message", {}).get("content", "").strip()
+    if not text:
+        raise ValueError("Ollama response did not include content")
+    return parse_json(text, usage)
+
+
+__all__ = ["LLMUsage", "chat_json", "coerce_list", "parse_json"]
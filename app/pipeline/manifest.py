@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+MANIFEST_NAME = "manifest.json"
+
+T = TypeVar("T")
+
+
+def hash_inputs(inputs: Any) -> str:
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _link(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class RunManifest:
+    """Per-run record of stage input hashes and the artifacts each stage produced.
+
+    A stage whose input hash matches an entry in this manifest, or in the
+    ``parent`` run it was forked from, is reused instead of recomputed. Parent
+    artifacts are hard-linked into this run's directory so every run stays
+    self-contained. Artifact paths are stored relative to the run directory.
+    """
+
+    def __init__(self, work_dir: Path, parent: Optional["RunManifest"] = None) -> None:
+        self.work_dir = work_dir
+        self.parent = parent
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.meta: Dict[str, Any] = {}
+        self.reused: List[str] = []
+        self.computed: List[str] = []
+
+    @classmethod
+    def load(cls, work_dir: Path) -> "RunManifest":
+        path = work_dir / MANIFEST_NAME
+        if not path.exists():
+            raise FileNotFoundError(f"No manifest in {work_dir}")
+        data = json.loads(path.read_text())
+        manifest = cls(work_dir)
+        manifest.stages = data.get("stages", {})
+        manifest.meta = data.get("meta", {})
+        return manifest
+
+    def save(self) -> None:
+        payload = {"stages": self.stages, "meta": self.meta}
+        (self.work_dir / MANIFEST_NAME).write_text(json.dumps(payload, indent=2))
+
+    def digest(self, name: str) -> Optional[str]:
+        entry = self.stages.get(name)
+        return entry["hash"] if entry else None
+
+    def result(self, name: str) -> Optional[Any]:
+        """The recorded result of ``name`` in this run, without checking inputs."""
+        entry = self.stages.get(name)
+        return self._decode(entry["result"]) if entry else None
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, Path):
+            return {"__path__": value.relative_to(self.work_dir).as_posix()}
+        if isinstance(value, (list, tuple)):
+            return [self._encode(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._encode(item) for key, item in value.items()}
+        return value
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, dict) and "__path__" in value:
+            return self.work_dir / value["__path__"]
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._decode(item) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def _artifacts(value: Any) -> List[str]:
+        if isinstance(value, dict) and "__path__" in value:
+            return [value["__path__"]]
+        if isinstance(value, list):
+            return [path for item in value for path in RunManifest._artifacts(item)]
+        if isinstance(value, dict):
+            return [path for item in value.values() for path in RunManifest._artifacts(item)]
+        return []
+
+    def available(self, name: str, inputs: Any) -> bool:
+        """Whether ``lookup`` would reuse ``name``, without linking anything."""
+        digest = hash_inputs(inputs)
+        for manifest in (self, self.parent):
+            entry = manifest.stages.get(name) if manifest else None
+            if entry and entry["hash"] == digest:
+                if all((manifest.work_dir / rel).exists() for rel in self._artifacts(entry["result"])):
+                    return True
+        return False
+
+    def lookup(self, name: str, inputs: Any) -> Optional[Any]:
+        """Return the stored result for ``name`` if its inputs are unchanged."""
+        digest = hash_inputs(inputs)
+        entry = self.stages.get(name)
+        if entry and entry["hash"] == digest:
+            if all((self.work_dir / rel).exists() for rel in self._artifacts(entry["result"])):
+                self.reused.append(name)
+                return self._decode(entry["result"])
+
+        parent_entry = self.parent.stages.get(name) if self.parent else None
+        if parent_entry and parent_entry["hash"] == digest:
+            artifacts = self._artifacts(parent_entry["result"])
+            if all((self.parent.work_dir / rel).exists() for rel in artifacts):
+                for rel in artifacts:
+                    _link(self.parent.work_dir / rel, self.work_dir / rel)
+                self.stages[name] = dict(parent_entry)
+                self.reused.append(name)
+                return self._decode(parent_entry["result"])
+        return None
+
+    def record(self, name: str, inputs: Any, result: T) -> T:
+        self.stages[name] = {"hash": hash_inputs(inputs), "result": self._encode(result)}
+        self.computed.append(name)
+        self.save()
+        return result
+
+    def run_stage(self, name: str, inputs: Any, produce: Callable[[], T]) -> T:
+        cached = self.lookup(name, inputs)
+        if cached is not None:
+            return cached
+        return self.record(name, inputs, produce())
+
+
+__all__ = ["RunManifest", "hash_inputs"]
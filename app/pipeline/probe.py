@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import shutil
+import struct
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+CACHE_SIZE = 256
+
+WAV_CODECS = {1: "pcm", 3: "pcm_float", 0xFFFE: "pcm_extensible"}
+
+_CACHE: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+class ProbeError(RuntimeError):
+    """Raised when media metadata cannot be read."""
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    duration: float
+    codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bits_per_sample: Optional[int] = None
+    audio_codec: Optional[str] = None
+
+    @property
+    def size(self) -> Optional[Tuple[int, int]]:
+        if self.width is None or self.height is None:
+            return None
+        return self.width, self.height
+
+
+def _probe_wav(path: Path) -> Optional[MediaInfo]:
+    """Read duration and format straight from a RIFF/WAVE header."""
+    with path.open("rb") as handle:
+        header = handle.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk = handle.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                body = handle.read(chunk_size + (chunk_size & 1))
+                fmt = struct.unpack("<HHIIHH", body[:16])
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                audio_format, channels, sample_rate, byte_rate, _align, bits = fmt
+                # Streaming writers often leave a placeholder size; trust the file instead.
+                available = path.stat().st_size - handle.tell()
+                data_size = chunk_size if 0 < chunk_size <= available else available
+                codec = f"{WAV_CODECS.get(audio_format, 'pcm')}_{'f' if audio_format == 3 else 's'}{bits}le"
+                return MediaInfo(
+                    duration=data_size / byte_rate if byte_rate else 0.0,
+                    codec=codec,
+                    sample_rate=sample_rate,
+                    channels=channels,
+                    bits_per_sample=bits,
+                    audio_codec=codec,
+                )
+            else:
+                handle.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def _parse_rate(value: Optional[str]) -> Optional[float]:
+    if not value or value in {"0/0", "0"}:
+        return None
+    numerator, _, denominator = value.partition("/")
+    return float(numerator) / float(denominator or 1)
+
+
+def _probe_ffprobe(path: Path, binary: str) -> MediaInfo:
+    result = subprocess.run(
+        [binary, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path.as_posix()],
+        capture_output=True,
+        check=True,
+        timeout=30,
+    )
+    data = json.loads(result.stdout or b"{}")
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    duration = data.get("format", {}).get("duration") or video.get("duration") or audio.get("duration")
+    return MediaInfo(
+        duration=float(duration or 0.0),
+        codec=video.get("codec_name") or audio.get("codec_name"),
+        width=video.get("width"),
+        height=video.get("height"),
+        fps=_parse_rate(video.get("avg_frame_rate") or video.get("r_frame_rate")),
+        sample_rate=int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+        channels=audio.get("channels"),
+        audio_codec=audio.get("codec_name"),
+    )
+
+
+def _probe_ffmpeg(path: Path) -> MediaInfo:
+    """Fallback when ffprobe is unavailable: one ``ffmpeg -i`` call via moviepy's parser."""
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+    infos = ffmpeg_parse_infos(path.as_posix())
+    width, height = infos.get("video_size") or (None, None)
+    return MediaInfo(
+        duration=float(infos.get("duration") or 0.0),
+        width=width,
+        height=height,
+        fps=infos.get("video_fps"),
+        sample_rate=infos.get("audio_fps") if infos.get("audio_found") else None,
+    )
+
+
+def probe_media(path: Path) -> MediaInfo:
+    """Return duration, codec, resolution and fps for ``path``, memoized by path and mtime."""
+    stat = path.stat()
+    key = (path.resolve().as_posix(), stat.st_mtime_ns, stat.st_size)
+    with _LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None:
+            _CACHE.move_to_end(key)
+            return cached
+
+    try:
+        info = _probe_wav(path)
+        if info is None:
+            binary = shutil.which("ffprobe")
+            info = _probe_ffprobe(path, binary) if binary else _probe_ffmpeg(path)
+    except (OSError, ValueError, struct.error, subprocess.SubprocessError) as exc:
+        raise ProbeError(f"Could not probe {path}") from exc
+
+    with _LOCK:
+        _CACHE[key] = info
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return info
+
+
+__all__ = ["MediaInfo", "ProbeError", "probe_media"]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+_FALLBACK_STARTS: Dict[int, str] = {}
+
+
+def pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_start(pid: int) -> Optional[str]:
+    """Start time of ``pid`` in clock ticks since boot, or ``None`` without ``/proc``."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # Field 22; the command name in field 2 may itself contain spaces or parens.
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+def process_token() -> str:
+    """``pid:start`` identifying this process even after its pid is reused."""
+    pid = os.getpid()
+    start = process_start(pid) or _FALLBACK_STARTS.setdefault(pid, uuid.uuid4().hex)
+    return f"{pid}:{start}"
+
+
+def owner_alive(token: str) -> bool:
+    """Whether the process that wrote ``token`` still runs.
+
+    A bare pid (from before tokens were recorded) is trusted if that pid is
+    alive, unless it is our own: then it was left by an earlier process.
+    """
+    pid_text, _, start = token.partition(":")
+    pid = int(pid_text or 0)
+    if pid == os.getpid():
+        # A restarted process often gets the crashed one's pid back.
+        return token == process_token()
+    if not pid_alive(pid):
+        return False
+    current = process_start(pid)
+    return not start or current is None or current == start
+
+
+__all__ = ["owner_alive", "pid_alive", "process_start", "process_token"]
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Tuple
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Encoder parameters shared by every encode of a run.
+
+    Segments written with the same profile have identical stream parameters,
+    which is what allows them to be concatenated by stream copy.
+    """
+
+    name: str
+    width: int
+    height: int
+    fps: int = 24
+    codec: str = "libx264"
+    preset: str = "medium"
+    crf: int = 23
+    pixel_format: str = "yuv420p"
+    audio_codec: str = "aac"
+    audio_fps: int = 44100
+    audio_channels: int = 2
+    audio_bitrate: str = "128k"
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def fingerprint(self) -> str:
+        payload = repr(sorted(asdict(self).items())).encode()
+        return hashlib.sha1(payload).hexdigest()[:10]
+
+    def write_kwargs(self, audio: bool = True) -> Dict[str, Any]:
+        """Keyword arguments for moviepy's ``write_videofile``."""
+        kwargs: Dict[str, Any] = {
+            "fps": self.fps,
+            "codec": self.codec,
+            "preset": self.preset,
+            "ffmpeg_params": ["-crf", str(self.crf), "-pix_fmt", self.pixel_format],
+            "audio": audio,
+            "verbose": False,
+            "logger": None,
+        }
+        if audio:
+            kwargs.update(
+                audio_codec=self.audio_codec,
+                audio_fps=self.audio_fps,
+                audio_bitrate=self.audio_bitrate,
+            )
+        return kwargs
+
+
+RENDER_PROFILES: Dict[str, RenderProfile] = {
+    "standard": RenderProfile(name="standard", width=1080, height=1920),
+    "draft": RenderProfile(name="draft", width=540, height=960, preset="ultrafast", crf=28),
+}
+
+DEFAULT_PROFILE = RENDER_PROFILES["standard"]
+
+
+def get_profile(name: str) -> RenderProfile:
+    try:
+        return RENDER_PROFILES[name]
+    except KeyError as exc:
+        raise ValueError(f"Unknown render profile: {name}") from exc
+
+
+__all__ = ["RenderProfile", "RENDER_PROFILES", "DEFAULT_PROFILE", "get_profile"]
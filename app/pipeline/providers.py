@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import math
+import random
+import shutil
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import requests
+
+from ..config import AppSettings
+from .governor import GovernorSaturated, get_governor
+from .profiles import DEFAULT_PROFILE, RenderProfile, get_profile
+from .schema import ShotPlan
+from .video import (
+    VideoGenerationError,
+    _call_video_api,
+    _download_clip,
+    _generate_demo_clip,
+    _video_url,
+)
+
+
+@dataclass
+class ShotJob:
+    shot: ShotPlan
+    output_dir: Path
+    handle: Any = None
+    submitted_at: float = 0.0
+    next_poll: float = 0.0
+    poll_interval: float = 0.0
+    polls: int = 0
+    clip_path: Optional[Path] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class VideoProvider:
+    """Submit/poll/fetch interface for shot renderers.
+
+    ``submit`` must return quickly; ``poll`` reports whether the job is ready
+    (raising on failure) and may set ``job.next_poll`` to a provider-supplied
+    hint; ``fetch`` materialises the finished clip on disk. ``render_shots``
+    drives any number of jobs from a single loop, and gives up on a job
+    ``job_timeout`` seconds after submitting it.
+    """
+
+    name = "base"
+    # Local renderers produce the same text cards a fallback would.
+    renders_locally = False
+    job_timeout = 180.0
+    initial_poll_interval = 0.5
+    max_poll_interval = 10.0
+    poll_backoff = 1.5
+
+    def __init__(self, settings: AppSettings, profile: RenderProfile = DEFAULT_PROFILE) -> None:
+        self.settings = settings
+        self.profile = profile
+
+    def submit(self, job: ShotJob) -> None:
+        raise NotImplementedError
+
+    def poll(self, job: ShotJob) -> bool:
+        raise NotImplementedError
+
+    def fetch(self, job: ShotJob) -> Path:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources and abandon jobs that have not finished."""
+
+
+class ThreadedProvider(VideoProvider):
+    """Adapts a blocking renderer to the protocol by running it on worker threads."""
+
+    max_workers = 4
+
+    def __init__(self, settings: AppSettings, profile: RenderProfile = DEFAULT_PROFILE) -> None:
+        super().__init__(settings, profile)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=f"aivid-{self.name}"
+        )
+
+    def render(self, shot: ShotPlan, output_dir: Path) -> Path:
+        raise NotImplementedError
+
+    def submit(self, job: ShotJob) -> None:
+        job.handle = self._executor.submit(self.render, job.shot, job.output_dir)
+
+    def poll(self, job: ShotJob) -> bool:
+        future: Future = job.handle
+        if not future.done():
+            return False
+        future.result()  # re-raise render errors
+        return True
+
+    def fetch(self, job: ShotJob) -> Path:
+        return job.handle.result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PikaProvider(ThreadedProvider):
+    """The synchronous Pika-style API: one blocking POST returns the video URL."""
+
+    name = "pika"
+    job_timeout = 360.0  # blocking POST and download, up to 180 s each
+
+    def __init__(self, settings: AppSettings, profile: RenderProfile = DEFAULT_PROFILE) -> None:
+        self.max_workers = max(1, settings.governor.video_api_concurrency or 4)
+        super().__init__(settings, profile)
+
+    def render(self, shot: ShotPlan, output_dir: Path) -> Path:
+        return _call_video_api(shot, self.settings, output_dir)
+
+
+class DemoProvider(ThreadedProvider):
+    """Renders text cards locally; used in demo mode or without an API key."""
+
+    name = "demo"
+    renders_locally = True
+    initial_poll_interval = 0.1
+    max_poll_interval = 1.0
+
+    def __init__(self, settings: AppSettings, profile: RenderProfile = DEFAULT_PROFILE) -> None:
+        self.max_workers = max(1, settings.governor.max_encodes or 1)
+        super().__init__(settings, profile)
+
+    def render(self, shot: ShotPlan, output_dir: Path) -> Path:
+        with get_governor(self.settings).slot("encode"):
+            return _generate_demo_clip(shot, output_dir, self.profile)
+
+
+class PollingHTTPProvider(VideoProvider):
+    """Job-based HTTP APIs: POST returns a job id, ``GET {url}/{id}`` reports status.
+
+    Providers that answer the POST with a finished ``video_url`` are handled
+    too, in which case the first poll completes immediately.
+    """
+
+    name = "polling"
+    initial_poll_interval = 2.0
+    max_poll_interval = 15.0
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.settings.external.video_api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> dict:
+        response = requests.request(method, url, headers=self._headers(), timeout=30, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def submit(self, job: ShotJob) -> None:
+        payload = {"prompt": job.shot.prompt, "aspect_ratio": "9:16", "duration": job.shot.duration}
+        # Only submissions count against the video_api limits; status polls are
+        # cheap and must not stall the loop. timeout=0 lets render_jobs reschedule.
+        with get_governor(self.settings).slot("video_api", timeout=0):
+            data = self._request("POST", self.settings.external.video_api_url, json=payload)
+        job.extra["video_url"] = _video_url(data)
+        job.handle = data.get("id") or data.get("job_id") or data.get("data", {}).get("id")
+        if not job.handle and not job.extra["video_url"]:
+            raise VideoGenerationError("Video API response missing job id and video URL")
+
+    def poll(self, job: ShotJob) -> bool:
+        if job.extra.get("video_url"):
+            return True
+        base_url = self.settings.external.video_api_url.rstrip("/")
+        data = self._request("GET", f"{base_url}/{job.handle}")
+        status = str(data.get("status") or data.get("data", {}).get("status") or "").lower()
+        if status in {"failed", "error", "cancelled"}:
+            raise VideoGenerationError(f"Video job {job.handle} {status}: {data.get('error', '')}")
+        job.extra["video_url"] = _video_url(data)
+        if job.extra["video_url"]:
+            return True
+        eta = data.get("eta_seconds") or data.get("retry_after")
+        if eta:
+            job.next_poll = time.monotonic() + min(float(eta), self.max_poll_interval)
+        return False
+
+    def fetch(self, job: ShotJob) -> Path:
+        return _download_clip(job.extra["video_url"], job.shot, job.output_dir)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Parse ``fixed:S``, ``uniform:LO,HI`` or ``lognormal:MEDIAN,SIGMA`` into a sampler."""
+    kind, _, raw = spec.partition(":")
+    params = [float(value) for value in raw.split(",") if value.strip()]
+    kind = kind.strip().lower()
+    if kind == "fixed" and len(params) == 1:
+        return lambda rng: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "lognormal" and len(params) == 2:
+        mu = math.log(params[0])
+        return lambda rng: rng.lognormvariate(mu, params[1])
+    raise ValueError(f"Unsupported latency distribution: {spec!r}")
+
+
+class StubProvider(VideoProvider):
+    """Local stand-in for a remote API with configurable latency and failure rate.
+
+    Jobs become ready after a sampled delay without occupying a thread. Each
+    distinct duration is rendered once and copied, so throughput tests measure
+    the orchestration rather than the demo renderer.
+    """
+
+    name = "stub"
+    initial_poll_interval = 0.25
+
+    def __init__(
+        self,
+        settings: AppSettings,
+        profile: RenderProfile = DEFAULT_PROFILE,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__(settings, profile)
+        self.sample_latency = parse_latency(settings.external.stub_latency)
+        self.failure_rate = settings.external.stub_failure_rate
+        self.rng = random.Random(seed)
+        self._sources: Dict[float, Path] = {}
+
+    def submit(self, job: ShotJob) -> None:
+        job.handle = time.monotonic() + max(0.0, self.sample_latency(self.rng))
+        job.extra["fail"] = self.rng.random() < self.failure_rate
+
+    def poll(self, job: ShotJob) -> bool:
+        if time.monotonic() < job.handle:
+            return False
+        if job.extra["fail"]:
+            raise VideoGenerationError(f"Stub provider failed shot {job.shot.scene_number}")
+        return True
+
+    def fetch(self, job: ShotJob) -> Path:
+        source = self._sources.get(job.shot.duration)
+        if source is None or not source.exists():
+            template = ShotPlan(0, job.shot.description, job.shot.duration, job.shot.prompt)
+            with get_governor(self.settings).slot("encode"):
+                source = _generate_demo_clip(template, job.output_dir, self.profile)
+            source = source.rename(job.output_dir / f"stub_source_{len(self._sources)}.mp4")
+            self._sources[job.shot.duration] = source
+        clip_path = job.output_dir / f"shot_{job.shot.scene_number}.mp4"
+        shutil.copyfile(source, clip_path)
+        return clip_path
+
+
+PROVIDERS: Dict[str, Type[VideoProvider]] = {
+    "pika": PikaProvider,
+    "polling": PollingHTTPProvider,
+    "demo": DemoProvider,
+    "stub": StubProvider,
+}
+
+
+def register_provider(name: str, provider: Type[VideoProvider]) -> None:
+    PROVIDERS[name] = provider
+
+
+def provider_name(settings: AppSettings) -> str:
+    """Name of the backend ``build_provider`` will select for these settings."""
+    name = settings.external.video_provider
+    if name != "stub" and (settings.runtime.demo_mode or not settings.external.video_api_key):
+        return "demo"
+    return name
+
+
+def build_provider(settings: AppSettings, profile: RenderProfile = DEFAULT_PROFILE) -> VideoProvider:
+    name = provider_name(settings)
+    try:
+        provider = PROVIDERS[name]
+    except KeyError as exc:
+        raise VideoGenerationError(f"Unknown video provider: {name}") from exc
+    return provider(settings, profile)
+
+
+def render_jobs(
+    provider: VideoProvider,
+    shots: List[ShotPlan],
+    output_dir: Path,
+    wait_until: Optional[float] = None,
+    fallback: Optional[Callable[[ShotPlan, Path], Path]] = None,
+) -> List[ShotJob]:
+    """Submit every shot, then poll all pending jobs from one loop until they finish.
+
+    Each job backs off its own poll interval geometrically up to the
+    provider's maximum, and the loop sleeps until the earliest job is due.
+    With a ``fallback``, jobs whose submit, poll or fetch fails, and jobs still
+    pending once the monotonic clock passes ``wait_until``, are abandoned and
+    rendered with it instead; those jobs carry ``extra["substituted"]``. Shots
+    reached after ``wait_until`` are never submitted. A submit that raises
+    ``GovernorSaturated`` is retried from the loop, and a job still unfinished
+    ``provider.job_timeout`` seconds after it was queued is given up on.
+    """
+    if fallback is None:
+        wait_until = None
+    jobs = [ShotJob(shot=shot, output_dir=output_dir) for shot in shots]
+    queued = list(jobs)
+    pending: List[ShotJob] = []
+    substitutes: List[ShotJob] = []
+
+    try:
+        started = time.monotonic()
+        for job in jobs:
+            job.submitted_at = started
+        while queued or pending:
+            now = time.monotonic()
+            if wait_until is not None and now >= wait_until:
+                break  # shots still queued are never submitted
+            for job in [job for job in queued + pending if now - job.submitted_at >= provider.job_timeout]:
+                if fallback is None:
+                    raise VideoGenerationError(
+                        f"{provider.name} job for shot {job.shot.scene_number} "
+                        f"timed out after {provider.job_timeout:.0f}s"
+                    )
+                (queued if job in queued else pending).remove(job)
+                substitutes.append(job)
+
+            for job in [job for job in queued if job.next_poll <= now]:
+                try:
+                    provider.submit(job)
+                except GovernorSaturated as exc:
+                    # Retry from the loop rather than blocking every other job on the slot.
+                    job.next_poll = now + min(exc.retry_after, provider.max_poll_interval)
+                    continue
+                except Exception:
+                    if fallback is None:
+                        raise
+                    queued.remove(job)
+                    substitutes.append(job)
+                    continue
+                queued.remove(job)
+                pending.append(job)
+                job.submitted_at = time.monotonic()
+                job.poll_interval = provider.initial_poll_interval
+                job.next_poll = job.submitted_at + job.poll_interval
+
+            for job in [job for job in pending if job.next_poll <= now]:
+                job.polls += 1
+                try:
+                    ready = provider.poll(job)
+                    if ready:
+                        job.clip_path = provider.fetch(job)
+                except Exception:
+                    if fallback is None:
+                        raise
+                    pending.remove(job)
+                    substitutes.append(job)
+                    continue
+                if ready:
+                    pending.remove(job)
+                    continue
+                if job.next_poll > now:
+                    continue  # provider supplied its own hint
+                job.poll_interval = min(provider.max_poll_interval, job.poll_interval * provider.poll_backoff)
+                job.next_poll = now + job.poll_interval
+
+            waiting = queued + pending
+            if waiting:
+                wake = min(min(job.next_poll, job.submitted_at + provider.job_timeout) for job in waiting)
+                if wait_until is not None:
+                    wake = min(wake, wait_until)
+                time.sleep(max(0.0, wake - time.monotonic()))
+    except VideoGenerationError:
+        raise
+    except Exception as exc:
+        raise VideoGenerationError(f"{provider.name} provider failed: {exc}") from exc
+    finally:
+        provider.close()
+
+    # Abandoned jobs may still be writing into output_dir; keep substitutes apart.
+    fallback_dir = output_dir / "fallback"
+    for job in substitutes + queued + pending:
+        fallback_dir.mkdir(exist_ok=True)
+        job.clip_path = fallback(job.shot, fallback_dir)
+        job.extra["substituted"] = True
+    return jobs
+
+
+def render_shots(provider: VideoProvider, shots: List[ShotPlan], output_dir: Path) -> List[Path]:
+    return [job.clip_path for job in render_jobs(provider, shots, output_dir)]
+
+
+def generate_clip_jobs(
+    shots: List[ShotPlan],
+    settings: AppSettings,
+    work_dir: Path,
+    profile: RenderProfile = DEFAULT_PROFILE,
+    wait_until: Optional[float] = None,
+) -> List[ShotJob]:
+    """Render ``shots``, replacing any not ready by ``wait_until`` with local text cards.
+
+    Substitute cards are encoded with the draft profile: they only exist when
+    the run is already short of time.
+    """
+    output_dir = work_dir / "clips"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    provider = build_provider(settings, profile)
+    fallback = None
+    if wait_until is not None and not provider.renders_locally:
+        governor = get_governor(settings)
+
+        def fallback(shot: ShotPlan, target_dir: Path) -> Path:
+            with governor.slot("encode"):
+                return _generate_demo_clip(shot, target_dir, get_profile("draft"))
+
+    return render_jobs(provider, shots, output_dir, wait_until=wait_until, fallback=fallback)
+
+
+def generate_clips(
+    shots: List[ShotPlan],
+    settings: AppSettings,
+    work_dir: Path,
+    profile: RenderProfile = DEFAULT_PROFILE,
+) -> List[Path]:
+    return [job.clip_path for job in generate_clip_jobs(shots, settings, work_dir, profile)]
+
+
+__all__ = [
+    "ShotJob",
+    "VideoProvider",
+    "ThreadedProvider",
+    "PikaProvider",
+    "DemoProvider",
+    "PollingHTTPProvider",
+    "StubProvider",
+    "build_provider",
+    "generate_clip_jobs",
+    "generate_clips",
+    "parse_latency",
+    "provider_name",
+    "register_provider",
+    "render_jobs",
+    "render_shots",
+]
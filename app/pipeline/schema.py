@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 
 @dataclass
@@ -28,6 +28,15 @@ class ScriptPlan:
     captions: List[str]
 
 
+@dataclass
+class PlanPatch:
+    """Edits to a previous run's plan; ``shots`` maps scene_number to field overrides."""
+
+    script_text: Optional[str] = None
+    captions: Optional[List[str]] = None
+    shots: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+
 @dataclass
 class WorkflowResult:
     final_video_path: Path
@@ -41,5 +50,6 @@ __all__ = [
     "ConceptCandidate",
     "ShotPlan",
     "ScriptPlan",
+    "PlanPatch",
     "WorkflowResult",
 ]
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-import json
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..config import AppSettings
+from .deadline import Deadline
+from .ideation import choose_best_concept
+from .llm import LLMUsage, chat_json, coerce_list
 from .schema import ConceptCandidate, ScriptPlan, ShotPlan
 
 
@@ -28,60 +33,160 @@ DEMO_CAPTIONS = [
 ]
 
 
-def _extract_json_payload(text: str) -> dict:
-    cleaned = text.strip()
-    if cleaned.startswith("```"):
-        cleaned = "\n".join(
-            line for line in cleaned.splitlines() if not line.strip().startswith("```")
-        ).strip()
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError as exc:
-        raise ValueError("Failed to parse JSON from Ollama response") from exc
-
-
-def _call_ollama(concept: ConceptCandidate, topic: str, settings: AppSettings) -> ScriptPlan:
-    payload = {
-        "model": settings.external.ollama_model,
-        "messages": [
-            {"role": "system", "content": "You create production-ready short form scripts. Respond strictly in JSON."},
-            {
-                "role": "user",
-                "content": SCRIPT_PROMPT.format(concept=concept.angle, hook=concept.hook, topic=topic),
-            },
-        ],
-        "stream": False,
-    }
-    base_url = settings.external.ollama_base_url.rstrip("/")
-    response = requests.post(
-        f"{base_url}/api/chat",
-        json=payload,
-        timeout=120,
-    )
-    response.raise_for_status()
-    data = response.json()
-    text = data.get("message", {}).get("content", "").strip()
-    if not text:
-        raise ValueError("Ollama response did not include content")
-    parsed = _extract_json_payload(text)
-
-    script = parsed["script"].strip()
-    captions = [str(item).strip() for item in parsed.get("captions", [])]
-    shots = [
-        ShotPlan(
-            scene_number=int(item.get("scene_number", idx + 1)),
-            description=item.get("description", ""),
-            duration=float(item.get("duration_seconds", 5.0)),
-            prompt=item.get("prompt", ""),
+SHOT_ITEM_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "scene_number": {"type": "integer"},
+        "description": {"type": "string"},
+        "prompt": {"type": "string"},
+        "duration_seconds": {"type": "number"},
+    },
+    "required": ["scene_number", "description", "prompt", "duration_seconds"],
+}
+
+SCRIPT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "script": {"type": "string"},
+        "captions": {"type": "array", "items": {"type": "string"}},
+        "shots": {"type": "array", "items": SHOT_ITEM_SCHEMA},
+    },
+    "required": ["script", "captions", "shots"],
+}
+
+SHOTS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"shots": SCRIPT_SCHEMA["properties"]["shots"]},
+    "required": ["shots"],
+}
+
+CAPTIONS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"captions": SCRIPT_SCHEMA["properties"]["captions"]},
+    "required": ["captions"],
+}
+
+FOLLOWUP_PROMPT = """
+Script: {script}
+Respond in JSON with only the key {key}: {description}.
+"""
+
+MAX_ATTEMPTS = 2
+
+
+def _parse_shots(items: List[Any]) -> List[ShotPlan]:
+    shots = []
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        try:
+            duration = float(item.get("duration_seconds", item.get("duration", 5.0)))
+            scene_number = int(item.get("scene_number", idx + 1))
+        except (TypeError, ValueError):
+            duration, scene_number = 5.0, idx + 1
+        shots.append(
+            ShotPlan(
+                scene_number=scene_number,
+                description=str(item.get("description", "")),
+                duration=duration,
+                prompt=str(item.get("prompt") or item.get("description", "")),
+            )
         )
-        for idx, item in enumerate(parsed.get("shots", []))
+    return shots
+
+
+def _followup(
+    key: str,
+    description: str,
+    schema: Dict[str, Any],
+    script: str,
+    messages: List[Dict[str, str]],
+    settings: AppSettings,
+    usage: LLMUsage,
+    deadline: Optional[Deadline] = None,
+) -> List[Any]:
+    """Ask for one missing part of the plan instead of regenerating all of it."""
+    followup = messages + [
+        {"role": "user", "content": FOLLOWUP_PROMPT.format(script=script, key=key, description=description)}
+    ]
+    usage.add(followup_calls=1)
+    try:
+        return coerce_list(chat_json(settings, followup, schema, 120, usage, deadline), key)
+    except ValueError:
+        usage.add(wasted_calls=1)
+        return []
+
+
+def _call_ollama(
+    concept: ConceptCandidate,
+    topic: str,
+    settings: AppSettings,
+    usage: Optional[LLMUsage] = None,
+    deadline: Optional[Deadline] = None,
+) -> ScriptPlan:
+    usage = usage or LLMUsage()
+    messages = [
+        {"role": "system", "content": "You create production-ready short form scripts. Respond strictly in JSON."},
+        {
+            "role": "user",
+            "content": SCRIPT_PROMPT.format(concept=concept.angle, hook=concept.hook, topic=topic),
+        },
     ]
+
+    parsed: Dict[str, Any] = {}
+    for _attempt in range(MAX_ATTEMPTS):
+        try:
+            reply = chat_json(settings, messages, SCRIPT_SCHEMA, 120, usage, deadline)
+        except ValueError:
+            reply = None
+        if isinstance(reply, dict) and str(reply.get("script") or "").strip():
+            parsed = reply
+            break
+        usage.add(wasted_calls=1)
+    else:
+        raise ValueError("Script generator returned no script")
+
+    script = str(parsed["script"]).strip()
+    shots = _parse_shots(coerce_list(parsed.get("shots"), "shots"))
+    if not shots:
+        shots = _parse_shots(
+            _followup(
+                "shots",
+                "an array of objects with scene_number, description, prompt, duration_seconds",
+                SHOTS_SCHEMA,
+                script,
+                messages,
+                settings,
+                usage,
+                deadline,
+            )
+        )
     if not shots:
         raise ValueError("Script generator returned no shots")
+
+    raw_captions = parsed.get("captions")
+    if raw_captions is None:
+        raw_captions = _followup(
+            "captions",
+            "an array of short on-screen captions",
+            CAPTIONS_SCHEMA,
+            script,
+            messages,
+            settings,
+            usage,
+            deadline,
+        )
+    captions = [str(item).strip() for item in coerce_list(raw_captions, "captions") if str(item).strip()]
     return ScriptPlan(final_concept=concept, script_text=script, shots=shots, captions=captions)
 
 
-def generate_script(concept: ConceptCandidate, topic: str, settings: AppSettings) -> ScriptPlan:
+def generate_script(
+    concept: ConceptCandidate,
+    topic: str,
+    settings: AppSettings,
+    usage: Optional[LLMUsage] = None,
+    deadline: Optional[Deadline] = None,
+) -> ScriptPlan:
     if settings.runtime.demo_mode or not settings.external.ollama_model:
         shots = [
             ShotPlan(
@@ -107,7 +212,110 @@ def generate_script(concept: ConceptCandidate, topic: str, settings: AppSettings
         captions = [caption.format(topic=topic) for caption in DEMO_CAPTIONS]
         return ScriptPlan(final_concept=concept, script_text=script, shots=shots, captions=captions)
 
-    return _call_ollama(concept, topic, settings)
+    return _call_ollama(concept, topic, settings, usage, deadline)
+
+
+@dataclass
+class _ScriptAttempt:
+    concept: ConceptCandidate
+    plan: Optional[ScriptPlan]
+    error: Optional[Exception]
+    started: float
+    finished: float
+    usage: LLMUsage
+
+    @property
+    def elapsed(self) -> float:
+        return self.finished - self.started
+
+
+def _attempt_script(
+    concept: ConceptCandidate,
+    topic: str,
+    settings: AppSettings,
+    usage: LLMUsage,
+    deadline: Optional[Deadline] = None,
+) -> _ScriptAttempt:
+    started = time.perf_counter()
+    try:
+        plan = generate_script(concept, topic, settings, usage, deadline)
+    except Exception as exc:
+        return _ScriptAttempt(concept, None, exc, started, time.perf_counter(), usage)
+    return _ScriptAttempt(concept, plan, None, started, time.perf_counter(), usage)
+
+
+def generate_script_speculative(
+    candidates: List[ConceptCandidate],
+    topic: str,
+    settings: AppSettings,
+    top_n: int,
+    usage: Optional[LLMUsage] = None,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[ConceptCandidate, ScriptPlan, Dict[str, str]]:
+    """Generate scripts for the top ``top_n`` concepts concurrently.
+
+    The winner's plan is preferred; if it fails, the next ranked plan is used
+    without issuing a fresh request. Queued requests are cancelled once a plan
+    is chosen; requests already on the wire finish in the background. Returns
+    the concept actually used, its plan and wasted/saved LLM time stats.
+
+    Each attempt counts its calls in its own ``LLMUsage``. Only the chosen
+    attempt's counts are merged into ``usage`` as-is; every call made by the
+    other attempts up to that point is merged as wasted, and anything they do
+    afterwards is not counted.
+    """
+    winner = choose_best_concept(candidates)
+    ranked = sorted(candidates, key=lambda c: c.score, reverse=True)[: max(1, top_n)]
+    ranked[0] = winner
+
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=len(ranked), thread_name_prefix="aivid-script")
+    attempt_usage = [LLMUsage() for _ in ranked]
+    futures = [
+        executor.submit(_attempt_script, concept, topic, settings, attempt_usage[index], deadline)
+        for index, concept in enumerate(ranked)
+    ]
+    chosen: Optional[_ScriptAttempt] = None
+    chosen_index = 0
+    errors: List[Exception] = []
+    sequential_cost = 0.0
+    try:
+        for chosen_index, future in enumerate(futures):
+            attempt = future.result()
+            sequential_cost += attempt.elapsed
+            if attempt.plan is not None:
+                chosen = attempt
+                break
+            errors.append(attempt.error)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    if usage is not None:
+        for index, counts in enumerate(attempt_usage):
+            usage.merge(counts, wasted=chosen is None or index != chosen_index)
+
+    if chosen is None:
+        raise errors[0]
+
+    wall = time.perf_counter() - started
+    wasted = 0.0
+    for future in futures[chosen_index + 1 :]:
+        if future.cancelled():
+            continue
+        if future.done():
+            wasted += future.result().elapsed
+        else:
+            wasted += wall
+
+    stats = {
+        "speculative_candidates": str(len(ranked)),
+        "speculative_fallbacks": str(chosen_index),
+        "speculative_llm_saved_s": f"{max(0.0, sequential_cost - wall):.2f}",
+        "speculative_llm_wasted_s": f"{wasted:.2f}",
+    }
+    return chosen.concept, chosen.plan, stats
 
 
-__all__ = ["generate_script"]
+__all__ = ["generate_script", "generate_script_speculative"]
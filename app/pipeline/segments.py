@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from moviepy.audio.AudioClip import AudioArrayClip
+from moviepy.config import get_setting
+from moviepy.editor import ImageClip, VideoFileClip
+
+from ..config import AppSettings
+from .governor import get_governor
+from .probe import probe_media
+from .profiles import DEFAULT_PROFILE, RenderProfile
+from .schema import ShotPlan
+from .video import VideoGenerationError, _create_text_image, fit_to_frame
+
+POSITIONS = {"intro", "outro"}
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+@dataclass(frozen=True)
+class SegmentTemplate:
+    name: str
+    position: str = "outro"
+    text: str = ""
+    duration: float = 2.0
+    background: Tuple[int, int, int] = (18, 18, 18)
+    source: Optional[str] = None
+    replaces: Tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def digest(self) -> str:
+        payload = json.dumps(asdict(self), sort_keys=True)
+        if self.source and Path(self.source).exists():
+            payload += str(Path(self.source).stat().st_mtime_ns)
+        return hashlib.sha1(payload.encode()).hexdigest()[:10]
+
+    def replaces_shot(self, shot: ShotPlan) -> bool:
+        description = shot.description.lower()
+        return any(keyword.lower() in description for keyword in self.replaces)
+
+
+def load_templates(config_path: Path) -> List[SegmentTemplate]:
+    """Read segment templates from a JSON file; a missing file means no templates."""
+    if not config_path.exists():
+        return []
+    data = json.loads(config_path.read_text())
+    templates = []
+    for item in data.get("templates", []):
+        if not item.get("enabled", True):
+            continue
+        position = item.get("position", "outro")
+        if position not in POSITIONS:
+            raise ValueError(f"Template {item.get('name')!r} has unknown position {position!r}")
+        source = item.get("source")
+        if source and not Path(source).is_absolute():
+            source = (config_path.parent / source).as_posix()
+        templates.append(
+            SegmentTemplate(
+                name=item["name"],
+                position=position,
+                text=item.get("text", ""),
+                duration=float(item.get("duration", 2.0)),
+                background=tuple(item.get("background", (18, 18, 18))),
+                source=source,
+                replaces=tuple(item.get("replaces", ())),
+            )
+        )
+    return templates
+
+
+class TemplateLibrary:
+    """Pre-encoded intro/outro segments, one copy per template and render profile.
+
+    Segments live under ``<output_dir>/templates/<profile>/`` next to a JSON
+    sidecar with the template, profile and probed stream metadata. Because
+    they are encoded with the run's profile they can be spliced onto the
+    final video by stream copy.
+    """
+
+    def __init__(self, settings: AppSettings, profile: RenderProfile = DEFAULT_PROFILE) -> None:
+        self.settings = settings
+        self.profile = profile
+        self.templates = load_templates(settings.template_config)
+        self.root = settings.output_dir / "templates" / profile.name
+
+    def arrange(
+        self, shots: List[ShotPlan]
+    ) -> Tuple[List[SegmentTemplate], List[ShotPlan], List[SegmentTemplate]]:
+        """Split into intro templates, shots left to render, and outro templates."""
+        body = [shot for shot in shots if not any(t.replaces_shot(shot) for t in self.templates)]
+        if not body:
+            body = list(shots)
+        intros = [t for t in self.templates if t.position == "intro"]
+        outros = [t for t in self.templates if t.position == "outro"]
+        return intros, body, outros
+
+    def segment(self, template: SegmentTemplate) -> Path:
+        """Return the encoded segment for ``template``, encoding it on first use."""
+        path = self.root / f"{template.name}-{template.digest}-{self.profile.fingerprint}.mp4"
+        sidecar = path.with_suffix(".json")
+        if path.exists() and sidecar.exists():
+            os.utime(path)
+            return path
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        scratch = self.root / f"tmp-{uuid.uuid4().hex}.mp4"
+        try:
+            with get_governor(self.settings).slot("encode"):
+                self._render(template, scratch)
+            info = probe_media(scratch)
+            sidecar.write_text(
+                json.dumps(
+                    {"template": asdict(template), "profile": asdict(self.profile), "media": asdict(info)},
+                    indent=2,
+                )
+            )
+            os.replace(scratch, path)  # atomic, so concurrent runs never see partial files
+        finally:
+            scratch.unlink(missing_ok=True)
+        return path
+
+    def _render(self, template: SegmentTemplate, output_path: Path) -> None:
+        profile = self.profile
+        source = Path(template.source) if template.source else None
+        if source is not None and source.suffix.lower() not in IMAGE_SUFFIXES:
+            base = VideoFileClip(source.as_posix(), audio=False)
+            visual = fit_to_frame(base.subclip(0, min(base.duration, template.duration)), profile.size)
+        else:
+            if source is not None:
+                base = ImageClip(source.as_posix())
+                visual = fit_to_frame(base, profile.size)
+            else:
+                base = ImageClip(np.array(_create_text_image(template.text, profile.size, template.background)))
+                visual = base
+            visual = visual.set_duration(template.duration)
+
+        # A silent track keeps the stream layout identical to narrated segments.
+        frames = int(round(visual.duration * profile.audio_fps))
+        silence = AudioArrayClip(np.zeros((frames, profile.audio_channels), dtype=np.float32), fps=profile.audio_fps)
+        clip = visual.set_audio(silence)
+        try:
+            clip.write_videofile(output_path.as_posix(), **profile.write_kwargs(audio=True))
+        finally:
+            clip.close()
+            base.close()
+
+
+def splice_segments(segment_paths: List[Path], output_path: Path) -> Path:
+    """Concatenate same-profile segments by stream copy, without re-encoding."""
+    list_path = output_path.with_suffix(".concat.txt")
+    list_path.write_text("".join(f"file '{path.resolve().as_posix()}'\n" for path in segment_paths))
+    try:
+        subprocess.run(
+            [
+                get_setting("FFMPEG_BINARY"),
+                "-y",
+                "-v", "error",
+                "-f", "concat",
+                "-safe", "0",
+                "-i", list_path.as_posix(),
+                "-c", "copy",
+                "-movflags", "+faststart",
+                output_path.as_posix(),
+            ],
+            capture_output=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as exc:
+        raise VideoGenerationError(f"Segment splice failed: {exc.stderr.decode(errors='ignore')}") from exc
+    finally:
+        list_path.unlink(missing_ok=True)
+    return output_path
+
+
+__all__ = ["SegmentTemplate", "TemplateLibrary", "load_templates", "splice_segments"]
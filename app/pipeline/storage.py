@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..config import AppSettings
+from .process import owner_alive, process_token
+
+MB = 1024 * 1024
+FileKey = Tuple[int, int]  # (st_dev, st_ino)
+ACTIVE_MARKER = ".active"
+
+_SWEPT_ROOTS: Set[Path] = set()
+
+
+class StorageQuotaError(RuntimeError):
+    """Raised when a run cannot be admitted because storage is exhausted."""
+
+
+@dataclass
+class StorageEntry:
+    path: Path
+    category: str
+    size: int
+    last_used: float
+    active: bool = False
+    # Size of each distinct file below ``path``; hard links share a key.
+    files: Dict[FileKey, int] = field(default_factory=dict)
+
+
+def _categorize(path: Path) -> str:
+    if path.is_dir() and path.name.startswith("run_"):
+        return "runs"
+    if path.name.startswith("final_") and path.suffix == ".mp4":
+        return "outputs"
+    return "caches"
+
+
+def _measure(path: Path) -> Tuple[Dict[FileKey, int], float]:
+    """Return the size of each distinct file below ``path`` and the newest mtime.
+
+    Files are keyed by device and inode, so hard links are only counted once.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return {}, 0.0
+    if not path.is_dir():
+        return {(stat.st_dev, stat.st_ino): stat.st_size}, stat.st_mtime
+
+    sizes: Dict[FileKey, int] = {}
+    newest = stat.st_mtime
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                file_stat = os.stat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            sizes[(file_stat.st_dev, file_stat.st_ino)] = file_stat.st_size
+            newest = max(newest, file_stat.st_mtime)
+    return sizes, newest
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+class StorageManager:
+    """Tracks disk usage below the output directory and enforces the configured quota.
+
+    Entries are top-level children of ``settings.output_dir``: ``run_*`` work
+    directories, ``final_*.mp4`` outputs and anything else (caches). Hidden
+    files are never evicted. Runs in progress carry an ``.active`` marker with
+    the owning process's pid and start time, so they are skipped by eviction
+    and can be recognised as abandoned once that process is gone, even if its
+    pid has since been reused.
+    """
+
+    def __init__(self, settings: AppSettings) -> None:
+        self.root = settings.output_dir
+        self.config = settings.storage
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def quota_bytes(self) -> int:
+        return int(self.config.quota_mb * MB)
+
+    @property
+    def min_free_bytes(self) -> int:
+        return int(self.config.min_free_mb * MB)
+
+    def free_bytes(self) -> int:
+        return shutil.disk_usage(self.root).free
+
+    def scan(self) -> List[StorageEntry]:
+        entries: List[StorageEntry] = []
+        for child in self.root.iterdir():
+            if child.name.startswith("."):
+                continue
+            files, last_used = _measure(child)
+            active = (child / ACTIVE_MARKER).exists()
+            entries.append(
+                StorageEntry(child, _categorize(child), sum(files.values()), last_used, active, files)
+            )
+        return entries
+
+    def usage(self) -> Dict[str, int]:
+        """Bytes on disk by category; a file linked into several entries counts once."""
+        totals = {"runs": 0, "outputs": 0, "caches": 0}
+        seen: Set[FileKey] = set()
+        for entry in self.scan():
+            for key, size in entry.files.items():
+                if key not in seen:
+                    seen.add(key)
+                    totals[entry.category] += size
+        totals["total"] = sum(totals.values())
+        return totals
+
+    def touch(self, path: Path) -> None:
+        """Mark ``path`` as recently used so LRU eviction keeps it longer."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def _is_stale(self, work_dir: Path, now: float) -> bool:
+        marker = work_dir / ACTIVE_MARKER
+        try:
+            alive = owner_alive(marker.read_text().strip())
+            started = marker.stat().st_mtime
+        except (FileNotFoundError, ValueError):
+            return False
+        if not alive:
+            return True
+        return now - started > self.config.stale_run_seconds
+
+    def cleanup_stale_runs(self) -> List[Path]:
+        """Remove ``run_*`` directories whose owning process crashed or hung."""
+        now = time.time()
+        removed: List[Path] = []
+        for child in self.root.glob("run_*"):
+            if child.is_dir() and self._is_stale(child, now):
+                _remove(child)
+                removed.append(child)
+        return removed
+
+    def evict(self, bytes_needed: int = 0, keep: Iterable[Path] = ()) -> List[Path]:
+        """Evict least recently used entries until ``bytes_needed`` fits.
+
+        Removing an entry only frees the files no other entry links to.
+        Entries in ``keep`` are never evicted.
+        """
+        protected = {path.resolve() for path in keep}
+        entries = self.scan()
+        links: Counter = Counter(key for entry in entries for key in entry.files)
+        used = sum({key: size for entry in entries for key, size in entry.files.items()}.values())
+        free = self.free_bytes()
+        evicted: List[Path] = []
+        candidates = sorted(
+            (e for e in entries if not e.active and e.path.resolve() not in protected),
+            key=lambda e: e.last_used,
+        )
+        for entry in candidates:
+            over_quota = used + bytes_needed > self.quota_bytes
+            low_disk = free - bytes_needed < self.min_free_bytes
+            if not (over_quota or low_disk):
+                break
+            _remove(entry.path)
+            freed = 0
+            for key, size in entry.files.items():
+                links[key] -= 1
+                if not links[key]:
+                    freed += size
+            used -= freed
+            free += freed
+            evicted.append(entry.path)
+        return evicted
+
+    def admit_run(self, bytes_needed: Optional[int] = None, keep: Iterable[Path] = ()) -> List[Path]:
+        """Make room for a new run or raise :class:`StorageQuotaError`.
+
+        ``keep`` lists entries the run depends on, such as the run it edits.
+        """
+        if bytes_needed is None:
+            bytes_needed = int(self.config.run_reserve_mb * MB)
+        if bytes_needed > self.quota_bytes:
+            raise StorageQuotaError("Run reservation exceeds the configured storage quota")
+        evicted = self.evict(bytes_needed, keep)
+        used = self.usage()["total"]
+        if used + bytes_needed > self.quota_bytes:
+            raise StorageQuotaError(
+                f"Storage quota exhausted: {used // MB} MB used of {self.quota_bytes // MB} MB"
+            )
+        if self.free_bytes() - bytes_needed < self.min_free_bytes:
+            raise StorageQuotaError(f"Insufficient free disk space in {self.root}")
+        return evicted
+
+    def begin_run(self, run_id: str) -> Path:
+        work_dir = self.root / f"run_{run_id}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        (work_dir / ACTIVE_MARKER).write_text(process_token())
+        return work_dir
+
+    def finish_run(self, work_dir: Path, keep: bool = False) -> None:
+        if keep:
+            (work_dir / ACTIVE_MARKER).unlink(missing_ok=True)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def startup_cleanup(settings: AppSettings) -> List[Path]:
+    """Sweep stale run directories once per process and output directory."""
+    root = settings.output_dir.resolve()
+    if root in _SWEPT_ROOTS:
+        return []
+    _SWEPT_ROOTS.add(root)
+    return StorageManager(settings).cleanup_stale_runs()
+
+
+__all__ = ["StorageManager", "StorageEntry", "StorageQuotaError", "startup_cleanup"]
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import datetime as dt
+import subprocess
 from pathlib import Path
 from typing import List, Sequence, Tuple
 
 import numpy as np
 import srt
 from PIL import Image, ImageDraw, ImageFont
-from moviepy.editor import CompositeVideoClip, ImageClip, VideoFileClip
+from moviepy.config import get_setting
+from moviepy.editor import CompositeVideoClip, ImageClip
+
+from .profiles import DEFAULT_PROFILE, RenderProfile
+from .video import VideoGenerationError, load_fitted_clip
 
 
 def _subtitle_timings(captions: Sequence[str], audio_duration: float) -> List[Tuple[float, float, str]]:
@@ -70,12 +75,18 @@ def build_subtitle_file(captions: Sequence[str], audio_duration: float, output_p
     return output_path
 
 
-def burn_subtitles(video_path: Path, captions: Sequence[str], audio_duration: float, output_path: Path) -> Path:
+def burn_subtitles(
+    video_path: Path,
+    captions: Sequence[str],
+    audio_duration: float,
+    output_path: Path,
+    profile: RenderProfile = DEFAULT_PROFILE,
+) -> Path:
     if not captions:
         video_path.replace(output_path)
         return output_path
 
-    clip = VideoFileClip(video_path.as_posix())
+    clip = load_fitted_clip(video_path, profile.size)
     overlays = []
     try:
         width, height = clip.size
@@ -88,16 +99,8 @@ def burn_subtitles(video_path: Path, captions: Sequence[str], audio_duration: fl
                 .set_position(("center", height - frame.shape[0] - 60))
             )
             overlays.append(overlay)
-        composed = CompositeVideoClip([clip] + overlays)
-        composed.write_videofile(
-            output_path.as_posix(),
-            fps=24,
-            codec="libx264",
-            audio=clip.audio is not None,
-            audio_codec="aac",
-            verbose=False,
-            logger=None,
-        )
+        composed = CompositeVideoClip([clip] + overlays).set_duration(clip.duration)
+        composed.write_videofile(output_path.as_posix(), **profile.write_kwargs(audio=clip.audio is not None))
     finally:
         clip.close()
         for overlay in overlays:
@@ -107,4 +110,35 @@ def burn_subtitles(video_path: Path, captions: Sequence[str], audio_duration: fl
     return output_path
 
 
-__all__ = ["build_subtitle_file", "burn_subtitles"]
+def mux_soft_subtitles(video_path: Path, subtitle_path: Path, output_path: Path, offset: float = 0.0) -> Path:
+    """Attach ``subtitle_path`` as a selectable ``mov_text`` track, copying the A/V streams.
+
+    Far cheaper than ``burn_subtitles`` since nothing is re-encoded; players
+    show the captions when subtitles are enabled. ``offset`` delays the cues,
+    e.g. past an intro spliced in front of the captioned body.
+    """
+    try:
+        subprocess.run(
+            [
+                get_setting("FFMPEG_BINARY"),
+                "-y",
+                "-v", "error",
+                "-i", video_path.as_posix(),
+                "-itsoffset", f"{offset:.3f}",
+                "-i", subtitle_path.as_posix(),
+                "-map", "0",
+                "-map", "1:s",
+                "-c", "copy",
+                "-c:s", "mov_text",
+                "-movflags", "+faststart",
+                output_path.as_posix(),
+            ],
+            capture_output=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as exc:
+        raise VideoGenerationError(f"Subtitle mux failed: {exc.stderr.decode(errors='ignore')}") from exc
+    return output_path
+
+
+__all__ = ["build_subtitle_file", "burn_subtitles", "mux_soft_subtitles"]
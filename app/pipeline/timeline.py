@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import List
+
+from .schema import ShotPlan
+
+MIN_SHOT_SECONDS = 0.5
+
+
+def plan_timeline(shots: List[ShotPlan], target_duration: float, min_shot: float = MIN_SHOT_SECONDS) -> List[ShotPlan]:
+    """Scale shot durations so the timeline ends exactly when the narration does.
+
+    Durations keep their planned proportions, no shot drops below ``min_shot``,
+    and shots that would start after the narration ends are dropped entirely.
+    """
+    if not shots or target_duration <= 0:
+        return list(shots)
+
+    keep = max(1, min(len(shots), int(target_duration // min_shot)))
+    shots = shots[:keep]
+    weights = [max(shot.duration, 0.0) for shot in shots]
+    total = sum(weights)
+    if total <= 0:
+        weights = [1.0] * len(shots)
+        total = float(len(shots))
+
+    durations = [target_duration * weight / total for weight in weights]
+    # Lift short shots to the floor and take the difference from the longer ones.
+    while True:
+        short = [idx for idx, value in enumerate(durations) if value < min_shot]
+        deficit = sum(min_shot - durations[idx] for idx in short)
+        long_total = sum(value for idx, value in enumerate(durations) if idx not in short)
+        if not short or deficit <= 1e-9 or long_total <= 0:
+            break
+        durations = [
+            min_shot if idx in short else value - deficit * value / long_total
+            for idx, value in enumerate(durations)
+        ]
+
+    return [replace(shot, duration=round(duration, 3)) for shot, duration in zip(shots, durations)]
+
+
+__all__ = ["MIN_SHOT_SECONDS", "plan_timeline"]
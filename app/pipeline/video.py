@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 import numpy as np
 import requests
@@ -9,9 +9,13 @@ from PIL import Image, ImageDraw, ImageFont
 from moviepy.editor import ImageClip, VideoFileClip, concatenate_videoclips
 
 from ..config import AppSettings
+from .governor import get_governor
+from .probe import probe_media
+from .profiles import DEFAULT_PROFILE, RenderProfile
 from .schema import ShotPlan
+from .timeline import MIN_SHOT_SECONDS
 
-ASPECT_RATIO = (1080, 1920)
+ASPECT_RATIO = DEFAULT_PROFILE.size
 
 
 class VideoGenerationError(RuntimeError):
@@ -28,17 +32,25 @@ def _call_video_api(shot: ShotPlan, settings: AppSettings, output_dir: Path) ->
         "Authorization": f"Bearer {settings.external.video_api_key}",
         "Content-Type": "application/json",
     }
-    response = requests.post(
-        settings.external.video_api_url,
-        json=payload,
-        headers=headers,
-        timeout=180,
-    )
+    with get_governor(settings).slot("video_api"):
+        response = requests.post(
+            settings.external.video_api_url,
+            json=payload,
+            headers=headers,
+            timeout=180,
+        )
     response.raise_for_status()
-    data = response.json()
-    download_url = data.get("video_url") or data.get("data", {}).get("url")
+    download_url = _video_url(response.json())
     if not download_url:
         raise VideoGenerationError("Video API response missing video URL")
+    return _download_clip(download_url, shot, output_dir)
+
+
+def _video_url(data: dict) -> Optional[str]:
+    return data.get("video_url") or data.get("data", {}).get("url")
+
+
+def _download_clip(download_url: str, shot: ShotPlan, output_dir: Path) -> Path:
     content = requests.get(download_url, timeout=180)
     content.raise_for_status()
     clip_path = output_dir / f"shot_{shot.scene_number}.mp4"
@@ -46,9 +58,13 @@ def _call_video_api(shot: ShotPlan, settings: AppSettings, output_dir: Path) ->
     return clip_path
 
 
-def _create_text_image(text: str) -> Image.Image:
-    width, height = ASPECT_RATIO
-    image = Image.new("RGB", (width, height), color=(18, 18, 18))
+def _create_text_image(
+    text: str,
+    size: Tuple[int, int] = ASPECT_RATIO,
+    background: Tuple[int, int, int] = (18, 18, 18),
+) -> Image.Image:
+    width, height = size
+    image = Image.new("RGB", (width, height), color=background)
     draw = ImageDraw.Draw(image)
     font = ImageFont.load_default()
     lines = []
@@ -76,47 +92,77 @@ def _create_text_image(text: str) -> Image.Image:
     return image
 
 
-def _generate_demo_clip(shot: ShotPlan, output_dir: Path) -> Path:
-    image = _create_text_image(shot.description)
+def _generate_demo_clip(shot: ShotPlan, output_dir: Path, profile: RenderProfile = DEFAULT_PROFILE) -> Path:
+    image = _create_text_image(shot.description, profile.size)
     frame = np.array(image)
-    clip = ImageClip(frame).set_duration(max(shot.duration, 2.0))
+    clip = ImageClip(frame).set_duration(max(shot.duration, MIN_SHOT_SECONDS))
     clip_path = output_dir / f"demo_shot_{shot.scene_number}.mp4"
-    clip.write_videofile(
-        clip_path.as_posix(),
-        fps=24,
-        codec="libx264",
-        audio=False,
-        verbose=False,
-        logger=None,
-    )
+    clip.write_videofile(clip_path.as_posix(), **profile.write_kwargs(audio=False))
     clip.close()
     return clip_path
 
 
-def generate_clips(shots: List[ShotPlan], settings: AppSettings, work_dir: Path) -> List[Path]:
-    output_dir = work_dir / "clips"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    clip_paths: List[Path] = []
-    for shot in shots:
-        if settings.runtime.demo_mode or not settings.external.video_api_key:
-            clip_paths.append(_generate_demo_clip(shot, output_dir))
-        else:
-            clip_paths.append(_call_video_api(shot, settings, output_dir))
-    return clip_paths
+def fit_to_frame(clip: VideoFileClip, size: Tuple[int, int]) -> VideoFileClip:
+    """Scale ``clip`` to cover ``size`` and centre-crop the overflow.
+
+    Frames are scaled with Pillow directly because moviepy 1.0.3's ``resize``
+    uses ``Image.ANTIALIAS``, which Pillow 10 removed. Prefer
+    ``load_fitted_clip`` for files, which scales in the ffmpeg decoder.
+    """
+    if tuple(clip.size) == tuple(size):
+        return clip
+    width, height = size
+    scale = max(width / clip.w, height / clip.h)
+    crop_w = min(clip.w, max(1, round(width / scale)))
+    crop_h = min(clip.h, max(1, round(height / scale)))
+    left = (clip.w - crop_w) // 2
+    top = (clip.h - crop_h) // 2
+
+    if (crop_w, crop_h) == (width, height):
+        return clip.fl_image(lambda frame: frame[top : top + height, left : left + width])
+
+    def scale_frame(frame: np.ndarray) -> np.ndarray:
+        image = Image.fromarray(frame[top : top + crop_h, left : left + crop_w])
+        return np.asarray(image.resize((width, height), Image.LANCZOS))
+
+    return clip.fl_image(scale_frame)
+
+
+def load_fitted_clip(path: Path, size: Tuple[int, int]) -> VideoFileClip:
+    """Open ``path`` scaled to cover ``size`` and centre-cropped to it.
+
+    The scaling happens in the ffmpeg process decoding the file, so Python
+    only handles frames at (or just above) the target size and downscaling a
+    standard-size clip for a draft encode costs less than re-encoding it at
+    full size.
+    """
+    source_size = probe_media(path).size
+    if source_size is None or source_size == tuple(size):
+        return VideoFileClip(path.as_posix())
+    width, height = size
+    scale = max(width / source_size[0], height / source_size[1])
+    cover = (max(width, round(source_size[0] * scale)), max(height, round(source_size[1] * scale)))
+    clip = VideoFileClip(
+        path.as_posix(),
+        target_resolution=(cover[1], cover[0]),
+        resize_algorithm="lanczos",
+    )
+    return fit_to_frame(clip, size)
 
 
-def merge_clips(clip_paths: List[Path], final_path: Path) -> Path:
-    video_files = [VideoFileClip(path.as_posix()) for path in clip_paths]
+def merge_clips(
+    clip_paths: List[Path],
+    final_path: Path,
+    max_duration: Optional[float] = None,
+    profile: RenderProfile = DEFAULT_PROFILE,
+) -> Path:
+    # Every clip is decoded at the profile size, so they chain without per-frame resizing.
+    video_files = [load_fitted_clip(path, profile.size) for path in clip_paths]
     try:
-        final_clip = concatenate_videoclips(video_files, method="compose")
-        final_clip.write_videofile(
-            final_path.as_posix(),
-            fps=24,
-            codec="libx264",
-            audio=False,
-            verbose=False,
-            logger=None,
-        )
+        final_clip = concatenate_videoclips(video_files, method="chain")
+        if max_duration is not None and final_clip.duration > max_duration:
+            final_clip = final_clip.subclip(0, max_duration)
+        final_clip.write_videofile(final_path.as_posix(), **profile.write_kwargs(audio=False))
     finally:
         for clip in video_files:
             clip.close()
@@ -125,4 +171,4 @@ def merge_clips(clip_paths: List[Path], final_path: Path) -> Path:
     return final_path
 
 
-__all__ = ["generate_clips", "merge_clips", "VideoGenerationError"]
+__all__ = ["fit_to_frame", "load_fitted_clip", "merge_clips", "VideoGenerationError"]
@@ -2,54 +2,204 @@ from __future__ import annotations
 
 
 import json
-import shutil
+import re
 import uuid
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Dict, Iterator, Optional
 
 from ..config import AppSettings
-from .assembly import assemble_video
+from .assembly import assemble_fallback, assemble_video
+from .deadline import Deadline
+from .editing import EditError, apply_patch, plan_from_dict, plan_to_dict
+from .governor import AdmissionRejected, GovernorSaturated, get_governor
 from .ideation import build_metadata, choose_best_concept, generate_concepts
-from .schema import ScriptPlan, WorkflowResult
-from .scripting import generate_script
+from .llm import LLMUsage
+from .manifest import RunManifest
+from .schema import PlanPatch, ScriptPlan, WorkflowResult
+from .scripting import generate_script, generate_script_speculative
+from .storage import StorageManager, startup_cleanup
 
+# Run ids are the first 8 hex digits of a uuid4; anything else could escape the output directory.
+RUN_ID_PATTERN = re.compile(r"[0-9a-f]{8}")
 
-def generate_video_story(prompt: str, settings: AppSettings) -> WorkflowResult:
-    candidates = generate_concepts(prompt, settings)
-    winner = choose_best_concept(candidates)
-    script_plan: ScriptPlan = generate_script(winner, prompt, settings)
 
-    run_id = uuid.uuid4().hex[:8]
-    work_dir = settings.output_dir / f"run_{run_id}"
-    work_dir.mkdir(parents=True, exist_ok=True)
-    final_path = settings.output_dir / f"final_{run_id}.mp4"
+@contextmanager
+def _run_slot(settings: AppSettings) -> Iterator[None]:
+    """Hold a ``runs`` slot, shedding load immediately instead of queueing."""
+    governor = get_governor(settings)
+    try:
+        lease_id = governor.acquire("runs", timeout=0)
+    except GovernorSaturated as exc:
+        raise AdmissionRejected(exc.resource, exc.retry_after) from exc
+    try:
+        yield
+    finally:
+        governor.release(lease_id)
+
+
+def generate_video_story(
+    prompt: str, settings: AppSettings, deadline_s: Optional[float] = None
+) -> WorkflowResult:
+    """Run the full pipeline for ``prompt``.
+
+    ``deadline_s`` (default ``AIVID_DEADLINE_SECONDS``; 0 disables it) is the
+    latency budget for the whole run. Falling behind it degrades the render
+    rather than failing it; the ``degradations`` metadata lists what was given up.
+    """
+    deadline = Deadline(settings.runtime.deadline_seconds if deadline_s is None else deadline_s)
+    with _run_slot(settings):
+        return _run_pipeline(prompt, settings, deadline)
 
-    assemble_video(
-        script_text=script_plan.script_text,
-        captions=script_plan.captions,
-        shots=script_plan.shots,
-        settings=settings,
-        work_dir=work_dir,
-        final_path=final_path,
-    )
+
+def _run_pipeline(prompt: str, settings: AppSettings, deadline: Deadline) -> WorkflowResult:
+    startup_cleanup(settings)
+    storage = StorageManager(settings)
+    storage.admit_run()
+
+    usage = LLMUsage()
+    script_plan: ScriptPlan
+    speculation: Dict[str, str] = {}
+    try:
+        with deadline.stage("ideation"):
+            candidates = generate_concepts(prompt, settings, usage, deadline)
+        with deadline.stage("scripting"):
+            if settings.runtime.speculative_scripts > 1 and len(candidates) > 1:
+                winner, script_plan, speculation = generate_script_speculative(
+                    candidates, prompt, settings, settings.runtime.speculative_scripts, usage, deadline
+                )
+            else:
+                winner = choose_best_concept(candidates)
+                script_plan = generate_script(winner, prompt, settings, usage, deadline)
+    except Exception as exc:
+        if not deadline.active:
+            raise
+        # No plan to render: ship a card for the prompt itself.
+        return _render_unplanned(prompt, {"prompt": prompt, **usage.as_metadata()}, exc, settings, deadline)
 
     leaderboard, winner_score = build_metadata(candidates, winner)
     metadata = {
         "prompt": prompt,
-        "run_id": run_id,
         "idea_leaderboard": leaderboard,
         "winner_score": winner_score,
-        "shots": json.dumps([shot.__dict__ for shot in script_plan.shots], indent=2),
+        **speculation,
+        **usage.as_metadata(),
+    }
+    return _render_plan(script_plan, winner.angle, metadata, settings, storage, deadline=deadline)
+
+
+def rerender_video_story(
+    run_id: str, patch: PlanPatch, settings: AppSettings, deadline_s: Optional[float] = None
+) -> WorkflowResult:
+    """Apply ``patch`` to a previous run's plan and redo only the affected stages.
+
+    The previous run must have been kept (``AIVID_EDITABLE_RUNS`` or
+    ``AIVID_KEEP_INTERMEDIATES``). The edit becomes a new run whose unchanged
+    artifacts are hard-linked from the previous one, so edits can be chained.
+    """
+    if not RUN_ID_PATTERN.fullmatch(run_id):
+        raise EditError(f"Invalid run id: {run_id!r}")
+    deadline = Deadline(settings.runtime.deadline_seconds if deadline_s is None else deadline_s)
+    with _run_slot(settings):
+        parent_dir = settings.output_dir / f"run_{run_id}"
+        try:
+            parent = RunManifest.load(parent_dir)
+        except FileNotFoundError as exc:
+            raise EditError(f"Run {run_id} is not available for editing") from exc
+
+        script_plan = apply_patch(plan_from_dict(parent.meta["plan"]), patch)
+        metadata = {**parent.meta.get("metadata", {}), "parent_run_id": run_id}
+
+        storage = StorageManager(settings)
+        # The parent's artifacts are reused below, so eviction must not take them.
+        storage.touch(parent_dir)
+        storage.admit_run(keep=[parent_dir])
+        return _render_plan(
+            script_plan, parent.meta["concept"], metadata, settings, storage, parent, deadline
+        )
+
+
+def _render_plan(
+    script_plan: ScriptPlan,
+    concept: str,
+    metadata: Dict[str, str],
+    settings: AppSettings,
+    storage: StorageManager,
+    parent: Optional[RunManifest] = None,
+    deadline: Optional[Deadline] = None,
+) -> WorkflowResult:
+    deadline = deadline or Deadline()
+    run_id = uuid.uuid4().hex[:8]
+    work_dir = storage.begin_run(run_id)
+    final_path = settings.output_dir / f"final_{run_id}.mp4"
+    manifest = RunManifest(work_dir, parent=parent)
+    manifest.meta = {
+        "concept": concept,
+        "plan": plan_to_dict(script_plan),
+        "metadata": {key: value for key, value in metadata.items() if key != "parent_run_id"},
     }
 
-    if not settings.runtime.keep_intermediates:
-        shutil.rmtree(work_dir, ignore_errors=True)
+    keep = settings.runtime.keep_intermediates or settings.runtime.editable_runs
+    try:
+        assemble_video(
+            script_text=script_plan.script_text,
+            captions=script_plan.captions,
+            shots=script_plan.shots,
+            settings=settings,
+            work_dir=work_dir,
+            final_path=final_path,
+            manifest=manifest,
+            deadline=deadline,
+        )
+    except Exception as exc:
+        if not deadline.active:
+            raise
+        # Under a deadline a degraded video beats an error: ship a card instead.
+        deadline.degrade("fallback_card")
+        metadata = {**metadata, "fallback_reason": f"{type(exc).__name__}: {exc}"}
+        voiceover = manifest.result("voiceover")
+        assemble_fallback(concept, settings, final_path, voiceover["path"] if voiceover else None, deadline)
+    finally:
+        storage.finish_run(work_dir, keep=keep)
+
+    metadata = {
+        **metadata,
+        "run_id": run_id,
+        "shots": json.dumps([asdict(shot) for shot in script_plan.shots], indent=2),
+        "stages_reused": ", ".join(manifest.reused) or "none",
+        "stages_computed": ", ".join(manifest.computed) or "none",
+        **deadline.as_metadata(),
+    }
 
     return WorkflowResult(
         final_video_path=final_path,
         script_text=script_plan.script_text,
         captions=script_plan.captions,
-        final_concept=winner.angle,
+        final_concept=concept,
         metadata=metadata,
     )
 
 
-__all__ = ["generate_video_story"]
+def _render_unplanned(
+    title: str, metadata: Dict[str, str], exc: Exception, settings: AppSettings, deadline: Deadline
+) -> WorkflowResult:
+    """Ship a fallback card for a run whose ideation or scripting did not finish in time."""
+    deadline.degrade("fallback_card")
+    run_id = uuid.uuid4().hex[:8]
+    final_path = settings.output_dir / f"final_{run_id}.mp4"
+    assemble_fallback(title, settings, final_path, deadline=deadline)
+    return WorkflowResult(
+        final_video_path=final_path,
+        script_text="",
+        captions=[],
+        final_concept=title,
+        metadata={
+            **metadata,
+            "fallback_reason": f"{type(exc).__name__}: {exc}",
+            "run_id": run_id,
+            **deadline.as_metadata(),
+        },
+    )
+
+
+__all__ = ["generate_video_story", "rerender_video_story"]
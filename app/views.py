@@ -4,6 +4,8 @@ from flask import Flask, render_template, request
 from werkzeug.utils import secure_filename
 
 from .config import AppSettings
+from .pipeline.governor import AdmissionRejected, GovernorSaturated
+from .pipeline.storage import StorageQuotaError, startup_cleanup
 from .pipeline.workflow import generate_video_story
 
 
@@ -12,6 +14,8 @@ class PipelineError(RuntimeError):
 
 
 def register_routes(app: Flask) -> None:
+    startup_cleanup(app.config["APP_SETTINGS"])
+
     @app.get("/")
     def index():
         return render_template("index.html")
@@ -26,6 +30,14 @@ def register_routes(app: Flask) -> None:
 
         try:
             result = generate_video_story(prompt, settings)
+        except AdmissionRejected as exc:
+            page = render_template("index.html", error="The generator is busy. Please try again shortly.")
+            return page, 429, {"Retry-After": str(int(exc.retry_after + 0.5))}
+        except GovernorSaturated as exc:
+            # A stage gave up waiting mid-run; retrying straight away would not help.
+            return render_template("index.html", error=f"The generator is overloaded: {exc}"), 503
+        except StorageQuotaError as exc:
+            return render_template("index.html", error=str(exc)), 507
         except Exception as exc:  # pragma: no cover - top level guard
             raise PipelineError(str(exc)) from exc
 
@@ -7,7 +7,7 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 # Ensure the app package is importable when the function is bundled.
 CURRENT_DIR = Path(__file__).resolve().parent
@@ -16,10 +16,16 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
 from app.config import load_settings
-from app.pipeline.workflow import generate_video_story
+from app.pipeline.editing import EditError, patch_from_dict
+from app.pipeline.governor import AdmissionRejected, GovernorSaturated
+from app.pipeline.storage import StorageQuotaError, startup_cleanup
+from app.pipeline.workflow import generate_video_story, rerender_video_story
 
+# Warm containers keep /tmp between invocations; clear runs left by crashed ones.
+startup_cleanup(load_settings())
 
-def _response(status: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+
+def _response(status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     return {
         "statusCode": status,
         "headers": {
@@ -27,6 +33,7 @@ def _response(status: int, payload: Dict[str, Any]) -> Dict[str, Any]:
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Headers": "Content-Type",
             "Access-Control-Allow-Methods": "POST,OPTIONS",
+            **(headers or {}),
         },
         "body": json.dumps(payload),
     }
@@ -41,15 +48,36 @@ def handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
     except json.JSONDecodeError:
         return _response(400, {"error": "Invalid JSON payload."})
 
+    # {"run_id": ..., "patch": {...}} re-renders a previous run instead of starting a new one.
+    edit_run_id = str(payload.get("run_id") or "").strip()
     prompt = (payload.get("prompt") or "").strip()
-    if not prompt:
+    if not prompt and not edit_run_id:
         return _response(400, {"error": "Please provide a prompt with 1-3 sentences."})
 
+    # Optional per-request latency budget; overrides AIVID_DEADLINE_SECONDS.
+    try:
+        deadline_s = float(payload["deadline_seconds"]) if payload.get("deadline_seconds") is not None else None
+    except (TypeError, ValueError):
+        return _response(400, {"error": "deadline_seconds must be a number."})
+
     result = None
     try:
         settings = load_settings()
-        result = generate_video_story(prompt, settings)
+        if edit_run_id:
+            patch = patch_from_dict(payload.get("patch") or {})
+            result = rerender_video_story(edit_run_id, patch, settings, deadline_s)
+        else:
+            result = generate_video_story(prompt, settings, deadline_s)
         video_bytes = result.final_video_path.read_bytes()
+    except EditError as exc:
+        return _response(400, {"error": "Edit failed", "details": str(exc)})
+    except AdmissionRejected as exc:
+        retry_after = str(int(exc.retry_after + 0.5))
+        return _response(429, {"error": "Too many requests", "details": str(exc)}, {"Retry-After": retry_after})
+    except GovernorSaturated as exc:
+        return _response(503, {"error": "Generator overloaded", "details": str(exc)})
+    except StorageQuotaError as exc:
+        return _response(507, {"error": "Insufficient storage", "details": str(exc)})
     except Exception as exc:  # pragma: no cover - surfaces runtime issues to client
         return _response(500, {"error": "Video generation failed", "details": str(exc)})
     finally:
@@ -60,7 +88,7 @@ def handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
                 pass
 
     body = {
-        "prompt": prompt,
+        "prompt": prompt or result.metadata.get("prompt", ""),
         "final_concept": result.final_concept,
         "script_text": result.script_text,
         "captions": result.captions,
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+
+from app.config import load_settings
+from app.pipeline.editing import EditError, apply_patch, patch_from_dict, plan_from_dict, plan_to_dict
+from app.pipeline.schema import ConceptCandidate, PlanPatch, ScriptPlan, ShotPlan
+from app.pipeline.workflow import rerender_video_story
+
+
+@pytest.mark.parametrize("run_id", ["", "1a2b3c4d/../..", "../../etc", "1A2B3C4D", "1a2b3c4d\n", "1a2b3c4d5"])
+def test_rerender_rejects_malformed_run_ids(run_id):
+    with pytest.raises(EditError):
+        rerender_video_story(run_id, PlanPatch(), load_settings())
+
+
+def _plan() -> ScriptPlan:
+    return ScriptPlan(
+        final_concept=ConceptCandidate("angle", "hook", 80.0),
+        script_text="Original script.",
+        shots=[
+            ShotPlan(scene_number=1, description="one", duration=5.0, prompt="p1"),
+            ShotPlan(scene_number=2, description="two", duration=6.0, prompt="p2"),
+        ],
+        captions=["a", "b"],
+    )
+
+
+def test_plan_round_trips_through_dict():
+    plan = _plan()
+    assert plan_from_dict(plan_to_dict(plan)) == plan
+
+
+def test_caption_patch_keeps_everything_else():
+    plan = _plan()
+    edited = apply_patch(plan, patch_from_dict({"captions": ["x", 3]}))
+    assert edited.captions == ["x", "3"]
+    assert edited.shots == plan.shots
+    assert edited.script_text == plan.script_text
+
+
+def test_shot_patch_overrides_only_that_shot():
+    edited = apply_patch(_plan(), patch_from_dict({"shots": {"2": {"prompt": "new", "duration": "4"}}}))
+    assert edited.shots[0] == _plan().shots[0]
+    assert edited.shots[1] == ShotPlan(scene_number=2, description="two", duration=4.0, prompt="new")
+
+
+def test_unknown_scene_is_rejected():
+    with pytest.raises(EditError, match="Unknown scene"):
+        apply_patch(_plan(), patch_from_dict({"shots": {"7": {"prompt": "x"}}}))
+
+
+def test_unknown_shot_field_is_rejected():
+    with pytest.raises(EditError, match="Cannot edit"):
+        apply_patch(_plan(), patch_from_dict({"shots": {"1": {"scene_number": 3}}}))
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from app.config import load_settings
+from app.pipeline import governor as governor_module
+from app.pipeline.governor import LEASE_SECONDS, Governor, GovernorSaturated
+from app.pipeline.process import process_token
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(governor_module, "time", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def make_governor(tmp_path, monkeypatch):
+    def build(**env: str) -> Governor:
+        monkeypatch.setenv("AIVID_GOVERNOR_DB", str(tmp_path / "governor.sqlite3"))
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return Governor(load_settings())
+
+    return build
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _insert_lease(
+    gov: Governor, resource: str, pid: int, expires: float, host: str = "", owner: str = ""
+) -> None:
+    conn = gov._connect()
+    try:
+        conn.execute(
+            "INSERT INTO leases (id, resource, host, pid, owner, expires) VALUES (?, ?, ?, ?, ?, ?)",
+            (f"lease-{pid}-{expires}", resource, host or gov.host, pid, owner, expires),
+        )
+    finally:
+        conn.close()
+
+
+def test_semaphore_caps_concurrent_holders(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ENCODES="2")
+    first = gov.acquire("encode")
+    gov.acquire("encode")
+    with pytest.raises(GovernorSaturated) as excinfo:
+        gov.acquire("encode", timeout=0)
+    assert excinfo.value.resource == "encode"
+
+    gov.release(first)
+    gov.release(gov.acquire("encode", timeout=0))
+
+
+def test_token_bucket_refills_at_configured_rate(make_governor, clock):
+    gov = make_governor(AIVID_VIDEO_API_RPS="2", AIVID_VIDEO_API_CONCURRENCY="0")
+    # Capacity is max(1, rate): two immediate tokens, then one every half second.
+    gov.acquire("video_api", timeout=0)
+    gov.acquire("video_api", timeout=0)
+    with pytest.raises(GovernorSaturated) as excinfo:
+        gov.acquire("video_api", timeout=0)
+    assert excinfo.value.retry_after == pytest.approx(1.0)  # never advertised below 1 s
+
+    clock.now += 0.5
+    gov.acquire("video_api", timeout=0)
+    with pytest.raises(GovernorSaturated):
+        gov.acquire("video_api", timeout=0)
+
+
+def test_token_bucket_does_not_exceed_capacity(make_governor, clock):
+    gov = make_governor(AIVID_VIDEO_API_RPS="1", AIVID_VIDEO_API_CONCURRENCY="0")
+    gov.acquire("video_api", timeout=0)
+    clock.now += 60
+    gov.acquire("video_api", timeout=0)
+    with pytest.raises(GovernorSaturated):
+        gov.acquire("video_api", timeout=0)
+
+
+def test_blocking_acquire_waits_for_refill(make_governor, clock):
+    gov = make_governor(AIVID_VIDEO_API_RPS="1", AIVID_VIDEO_API_CONCURRENCY="0")
+    gov.acquire("video_api")
+    started = clock.now
+    gov.acquire("video_api", timeout=5)
+    assert 0.5 <= clock.now - started <= 2.0
+
+
+def test_leases_of_dead_local_processes_are_reaped(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ENCODES="1")
+    _insert_lease(gov, "encode", _dead_pid(), clock.now + LEASE_SECONDS)
+    gov.acquire("encode", timeout=0)
+
+
+def test_leases_of_a_crashed_process_with_our_pid_are_reaped(make_governor, clock):
+    # A restarted container often gets the crashed process's pid back.
+    gov = make_governor(AIVID_MAX_ENCODES="1")
+    _insert_lease(gov, "encode", os.getpid(), clock.now + LEASE_SECONDS, owner=f"{os.getpid()}:1")
+    gov.acquire("encode", timeout=0)
+
+
+def test_our_own_leases_are_kept(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ENCODES="1")
+    gov.acquire("encode", timeout=0)
+    with pytest.raises(GovernorSaturated):
+        gov.acquire("encode", timeout=0)
+
+
+def test_leases_record_the_owner_token(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ENCODES="1")
+    lease_id = gov.acquire("encode")
+    conn = gov._connect()
+    try:
+        (owner,) = conn.execute("SELECT owner FROM leases WHERE id = ?", (lease_id,)).fetchone()
+    finally:
+        conn.close()
+    assert owner == process_token()
+
+
+def test_databases_without_owner_column_are_upgraded(make_governor, clock, tmp_path):
+    conn = sqlite3.connect(tmp_path / "governor.sqlite3")
+    conn.execute(
+        "CREATE TABLE leases (id TEXT PRIMARY KEY, resource TEXT NOT NULL, host TEXT NOT NULL,"
+        " pid INTEGER NOT NULL, expires REAL NOT NULL)"
+    )
+    conn.close()
+    gov = make_governor(AIVID_MAX_ENCODES="1")
+    gov.acquire("encode", timeout=0)
+
+
+def test_expired_leases_are_reaped(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ENCODES="1")
+    _insert_lease(gov, "encode", os.getppid(), clock.now - 1)
+    gov.acquire("encode", timeout=0)
+
+
+def test_live_and_remote_leases_are_kept(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ENCODES="2")
+    _insert_lease(gov, "encode", os.getppid(), clock.now + LEASE_SECONDS)
+    # A pid on another host cannot be checked, so only expiry frees it.
+    _insert_lease(gov, "encode", _dead_pid(), clock.now + LEASE_SECONDS, host="elsewhere")
+    with pytest.raises(GovernorSaturated):
+        gov.acquire("encode", timeout=0)
+
+
+def test_retry_after_uses_typical_hold_time(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ACTIVE_RUNS="1")
+    lease = gov.acquire("runs")
+    clock.now += 100
+    gov.release(lease)
+
+    gov.acquire("runs")
+    clock.now += 30
+    with pytest.raises(GovernorSaturated) as excinfo:
+        gov.acquire("runs", timeout=0)
+    assert excinfo.value.retry_after == pytest.approx(70)
+
+
+def test_retry_after_without_history_uses_oldest_lease_age(make_governor, clock):
+    gov = make_governor(AIVID_MAX_ACTIVE_RUNS="1")
+    gov.acquire("runs")
+    clock.now += 45
+    with pytest.raises(GovernorSaturated) as excinfo:
+        gov.acquire("runs", timeout=0)
+    assert excinfo.value.retry_after == pytest.approx(45)
+
+
+def test_unlimited_resources_never_block(make_governor, clock):
+    gov = make_governor(AIVID_OLLAMA_CONCURRENCY="0")
+    for _ in range(20):
+        gov.acquire("ollama", timeout=0)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import pytest
+
+from app.pipeline.llm import LLMUsage, coerce_list, parse_json
+
+
+def test_clean_json_is_not_counted_as_repair():
+    usage = LLMUsage()
+    assert parse_json('{"angles": []}', usage) == {"angles": []}
+    assert usage.local_repairs == 0
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('```json\n{"a": 1}\n```', {"a": 1}),
+        ("```\n[1, 2]\n```", [1, 2]),
+    ],
+)
+def test_code_fences_are_stripped(text, expected):
+    assert parse_json(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('Here you go: {"a": 1} Hope that helps!', {"a": 1}),
+        ('Sure.\n[{"x": "y"}]\nAnything else?', [{"x": "y"}]),
+        ('{"a": {"b": "}"}} and {"c": 2}', {"a": {"b": "}"}}),
+    ],
+)
+def test_surrounding_prose_is_dropped(text, expected):
+    assert parse_json(text) == expected
+
+
+def test_smart_quotes_are_normalised():
+    assert parse_json("{“a”: “b”}") == {"a": "b"}
+
+
+def test_smart_quotes_inside_strings_are_kept():
+    text = '{"script": "He said “hi” today", "captions": ["a",],}'
+    assert parse_json(text) == {"script": "He said “hi” today", "captions": ["a"]}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": [1, 2,],}', {"a": [1, 2]}),
+        ('[{"x": 1,}, ]', [{"x": 1}]),
+        ('{"script": "wait, ] ok",}', {"script": "wait, ] ok"}),
+        ('{"a": ["x, }", "y",\n]}', {"a": ["x, }", "y"]}),
+    ],
+)
+def test_trailing_commas_are_removed(text, expected):
+    assert parse_json(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"captions": ["one", "two"', {"captions": ["one", "two"]}),
+        ('{"captions": ["see [here", "x"', {"captions": ["see [here", "x"]}),
+        ('{"script": "cut off mid sent', {"script": "cut off mid sent"}),
+        ('{"script": "ends on an escape \\', {"script": "ends on an escape "}),
+        ('[{"a": {"b": [1', [{"a": {"b": [1]}}]),
+    ],
+)
+def test_truncated_replies_are_closed(text, expected):
+    usage = LLMUsage()
+    assert parse_json(text, usage) == expected
+    assert usage.local_repairs == 1
+
+
+@pytest.mark.parametrize("text", ["no json here", '{"a": }', ""])
+def test_unrepairable_replies_raise(text):
+    with pytest.raises(ValueError):
+        parse_json(text)
+
+
+@pytest.mark.parametrize(
+    "parsed, expected",
+    [
+        ([1, 2], [1, 2]),
+        ({"angles": [1, 2], "note": [3]}, [1, 2]),
+        ({"items": [1, 2], "total": 2}, [1, 2]),
+        ({"angle": "x", "score": 3}, [{"angle": "x", "score": 3}]),
+        ({"a": [1], "b": [2]}, [{"a": [1], "b": [2]}]),
+        ({}, []),
+        ("text", []),
+        (None, []),
+    ],
+)
+def test_coerce_list(parsed, expected):
+    assert coerce_list(parsed, "angles") == expected
+
+
+def test_merge_marks_every_call_of_a_discarded_attempt_as_wasted():
+    total = LLMUsage()
+    total.merge(LLMUsage(calls=2, wasted_calls=1, followup_calls=1, seconds=3.0))
+    total.merge(LLMUsage(calls=3, wasted_calls=1, local_repairs=2, seconds=4.0), wasted=True)
+    assert (total.calls, total.wasted_calls, total.followup_calls, total.local_repairs) == (5, 4, 1, 2)
+    assert total.seconds == pytest.approx(7.0)
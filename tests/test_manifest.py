@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.pipeline.manifest import MANIFEST_NAME, RunManifest
+
+
+def _artifact(work_dir: Path, name: str, content: str = "data") -> Path:
+    path = work_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+@pytest.fixture
+def parent(tmp_path):
+    work_dir = tmp_path / "run_parent"
+    manifest = RunManifest(work_dir)
+    manifest.record("voiceover", {"script": "hi"}, {"path": _artifact(work_dir, "audio/voice.wav"), "duration": 3.0})
+    manifest.record("stitched", {"clips": ["a"]}, _artifact(work_dir, "stitched.mp4"))
+    return RunManifest.load(work_dir)
+
+
+def test_record_then_lookup_reuses_the_stage(tmp_path):
+    manifest = RunManifest(tmp_path)
+    calls = []
+
+    def produce():
+        calls.append(1)
+        return _artifact(tmp_path, "out.mp4")
+
+    first = manifest.run_stage("stitched", {"clips": ["a"]}, produce)
+    second = manifest.run_stage("stitched", {"clips": ["a"]}, produce)
+    assert first == second == tmp_path / "out.mp4"
+    assert len(calls) == 1
+    assert manifest.computed == ["stitched"]
+    assert manifest.reused == ["stitched"]
+
+
+def test_changed_inputs_recompute(tmp_path):
+    manifest = RunManifest(tmp_path)
+    manifest.record("stitched", {"clips": ["a"]}, _artifact(tmp_path, "out.mp4"))
+    assert manifest.lookup("stitched", {"clips": ["b"]}) is None
+    assert not manifest.available("stitched", {"clips": ["b"]})
+
+
+def test_missing_artifacts_are_not_reused(tmp_path):
+    manifest = RunManifest(tmp_path)
+    path = manifest.record("stitched", {"clips": ["a"]}, _artifact(tmp_path, "out.mp4"))
+    path.unlink()
+    assert not manifest.available("stitched", {"clips": ["a"]})
+    assert manifest.lookup("stitched", {"clips": ["a"]}) is None
+
+
+def test_manifest_round_trips_relative_paths(parent):
+    data = json.loads((parent.work_dir / MANIFEST_NAME).read_text())
+    assert data["stages"]["stitched"]["result"] == {"__path__": "stitched.mp4"}
+    assert parent.result("voiceover") == {"path": parent.work_dir / "audio/voice.wav", "duration": 3.0}
+
+
+def test_parent_stages_are_linked_into_the_child(parent, tmp_path):
+    child = RunManifest(tmp_path / "run_child", parent=parent)
+    assert child.available("voiceover", {"script": "hi"})
+    assert child.reused == []  # available() has no side effects
+
+    result = child.lookup("voiceover", {"script": "hi"})
+    voice = tmp_path / "run_child" / "audio" / "voice.wav"
+    assert result == {"path": voice, "duration": 3.0}
+    assert voice.read_text() == "data"
+    assert voice.stat().st_ino == (parent.work_dir / "audio" / "voice.wav").stat().st_ino
+    assert child.digest("voiceover") == parent.digest("voiceover")
+    assert child.reused == ["voiceover"]
+
+
+def test_parent_stage_with_changed_inputs_is_not_reused(parent, tmp_path):
+    child = RunManifest(tmp_path / "run_child", parent=parent)
+    assert child.lookup("voiceover", {"script": "edited"}) is None
+    assert not (tmp_path / "run_child" / "audio" / "voice.wav").exists()
+
+
+def test_parent_stage_with_missing_artifact_is_recomputed(parent, tmp_path):
+    (parent.work_dir / "stitched.mp4").unlink()
+    child = RunManifest(tmp_path / "run_child", parent=parent)
+    assert not child.available("stitched", {"clips": ["a"]})
+    assert child.lookup("stitched", {"clips": ["a"]}) is None
+
+
+def test_load_without_manifest_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RunManifest.load(tmp_path / "run_missing")
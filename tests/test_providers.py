@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from app.config import AppSettings, ExternalAPIConfig, RuntimeFlags
+from app.pipeline import providers as providers_module
+from app.pipeline.governor import GovernorSaturated
+from app.pipeline.providers import ShotJob, StubProvider, generate_clip_jobs, render_jobs
+from app.pipeline.schema import ShotPlan
+from app.pipeline.video import VideoGenerationError
+
+
+class FakeStub(StubProvider):
+    """``StubProvider`` that writes a placeholder file instead of rendering a clip."""
+
+    def __init__(self, latency: str = "fixed:5", failure_rate: float = 0.0, saturated: int = 0) -> None:
+        external = ExternalAPIConfig(video_provider="stub", stub_latency=latency, stub_failure_rate=failure_rate)
+        super().__init__(AppSettings(external=external), seed=0)
+        self.saturated = saturated  # submits to reject before accepting any
+        self.submits: List[int] = []
+        self.failing_fetches: set = set()
+
+    def submit(self, job: ShotJob) -> None:
+        if self.saturated:
+            self.saturated -= 1
+            raise GovernorSaturated("video_api", 3.0)
+        super().submit(job)
+        self.submits.append(job.shot.scene_number)
+
+    def fetch(self, job: ShotJob) -> Path:
+        if job.shot.scene_number in self.failing_fetches:
+            raise VideoGenerationError(f"download of shot {job.shot.scene_number} failed")
+        clip_path = job.output_dir / f"shot_{job.shot.scene_number}.mp4"
+        clip_path.write_text("clip")
+        return clip_path
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(providers_module, "time", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def cards(clock):
+    """Fallback that writes a card and records when it was made."""
+    made = []
+
+    def fallback(shot: ShotPlan, target_dir: Path) -> Path:
+        made.append((shot.scene_number, clock.now))
+        path = target_dir / f"card_{shot.scene_number}.mp4"
+        path.write_text("card")
+        return path
+
+    fallback.made = made
+    return fallback
+
+
+def _shots(count: int = 3) -> List[ShotPlan]:
+    return [ShotPlan(n, f"shot {n}", 4.0, f"prompt {n}") for n in range(1, count + 1)]
+
+
+def test_all_jobs_finish_from_one_loop(clock, tmp_path):
+    provider = FakeStub("fixed:5")
+    started = clock.now
+    jobs = render_jobs(provider, _shots(), tmp_path)
+
+    assert [job.clip_path for job in jobs] == [tmp_path / f"shot_{n}.mp4" for n in (1, 2, 3)]
+    assert not any(job.extra.get("substituted") for job in jobs)
+    # Polls back off geometrically, so the last one lands shortly after the latency.
+    assert 5 <= clock.now - started < 5 * provider.poll_backoff
+    assert all(job.polls < 10 for job in jobs)
+
+
+def test_poll_interval_is_capped(clock, tmp_path):
+    provider = FakeStub("fixed:120")
+    (job,) = render_jobs(provider, _shots(1), tmp_path)
+    assert job.poll_interval == provider.max_poll_interval
+
+
+def test_failed_job_raises_without_fallback(clock, tmp_path):
+    with pytest.raises(VideoGenerationError, match="Stub provider failed"):
+        render_jobs(FakeStub(failure_rate=1.0), _shots(), tmp_path)
+
+
+def test_failed_jobs_are_substituted(clock, tmp_path, cards):
+    jobs = render_jobs(FakeStub(failure_rate=1.0), _shots(), tmp_path, wait_until=clock.now + 60, fallback=cards)
+    assert all(job.extra["substituted"] for job in jobs)
+    assert [job.clip_path for job in jobs] == [tmp_path / "fallback" / f"card_{n}.mp4" for n in (1, 2, 3)]
+
+
+def test_failed_fetch_is_substituted(clock, tmp_path, cards):
+    provider = FakeStub()
+    provider.failing_fetches = {2}
+    jobs = render_jobs(provider, _shots(), tmp_path, wait_until=clock.now + 60, fallback=cards)
+    assert [bool(job.extra.get("substituted")) for job in jobs] == [False, True, False]
+
+
+def test_jobs_pending_at_the_cutoff_are_substituted(clock, tmp_path, cards):
+    cutoff = clock.now + 30
+    jobs = render_jobs(FakeStub("fixed:60"), _shots(), tmp_path, wait_until=cutoff, fallback=cards)
+    assert all(job.extra["substituted"] for job in jobs)
+    assert [made_at for _, made_at in cards.made] == [pytest.approx(cutoff)] * 3
+
+
+def test_cutoff_is_ignored_without_fallback(clock, tmp_path):
+    started = clock.now
+    jobs = render_jobs(FakeStub("fixed:60"), _shots(), tmp_path, wait_until=clock.now + 30)
+    assert all(job.clip_path.name.startswith("shot_") for job in jobs)
+    assert clock.now - started >= 60
+
+
+def test_saturated_submits_are_retried(clock, tmp_path):
+    provider = FakeStub("fixed:5", saturated=4)
+    jobs = render_jobs(provider, _shots(), tmp_path)
+    assert sorted(provider.submits) == [1, 2, 3]
+    assert not any(job.extra.get("substituted") for job in jobs)
+
+
+def test_shots_queued_at_the_cutoff_are_never_submitted(clock, tmp_path, cards):
+    provider = FakeStub("fixed:5", saturated=1000)
+    cutoff = clock.now + 20
+    jobs = render_jobs(provider, _shots(), tmp_path, wait_until=cutoff, fallback=cards)
+    assert provider.submits == []
+    assert all(job.extra["substituted"] for job in jobs)
+    assert clock.now == pytest.approx(cutoff)
+
+
+def test_job_timeout_raises_without_fallback(clock, tmp_path):
+    provider = FakeStub("fixed:500")
+    started = clock.now
+    with pytest.raises(VideoGenerationError, match="timed out after 180s"):
+        render_jobs(provider, _shots(1), tmp_path)
+    assert clock.now - started == pytest.approx(provider.job_timeout)
+
+
+def test_timed_out_jobs_are_substituted(clock, tmp_path, cards):
+    provider = FakeStub("fixed:500")
+    started = clock.now
+    jobs = render_jobs(provider, _shots(), tmp_path, wait_until=clock.now + 1000, fallback=cards)
+    assert all(job.extra["substituted"] for job in jobs)
+    assert [made_at - started for _, made_at in cards.made] == [pytest.approx(provider.job_timeout)] * 3
+
+
+def test_saturated_jobs_time_out_from_when_they_were_queued(clock, tmp_path, cards):
+    provider = FakeStub("fixed:5", saturated=1000)
+    started = clock.now
+    jobs = render_jobs(provider, _shots(1), tmp_path, wait_until=clock.now + 1000, fallback=cards)
+    assert jobs[0].extra["substituted"]
+    assert cards.made[0][1] - started == pytest.approx(provider.job_timeout)
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    calls = []
+
+    def fake_render_jobs(provider, shots, output_dir, wait_until=None, fallback=None):
+        calls.append((provider, fallback))
+        return []
+
+    monkeypatch.setattr(providers_module, "render_jobs", fake_render_jobs)
+    return calls
+
+
+def test_remote_providers_get_a_fallback_under_a_deadline(captured, tmp_path):
+    settings = AppSettings(output_dir=tmp_path, external=ExternalAPIConfig(video_provider="stub"))
+    generate_clip_jobs(_shots(), settings, tmp_path, wait_until=100.0)
+    generate_clip_jobs(_shots(), settings, tmp_path)
+    assert callable(captured[0][1])
+    assert captured[1][1] is None
+
+
+def test_local_renderers_never_get_a_fallback(captured, tmp_path):
+    settings = AppSettings(output_dir=tmp_path, runtime=RuntimeFlags(demo_mode=True))
+    generate_clip_jobs(_shots(), settings, tmp_path, wait_until=100.0)
+    provider, fallback = captured[0]
+    assert provider.renders_locally
+    assert fallback is None
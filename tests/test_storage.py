@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import pytest
+
+from app.config import AppSettings, StorageConfig
+from app.pipeline import storage as storage_module
+from app.pipeline.process import owner_alive, process_start, process_token
+from app.pipeline.storage import ACTIVE_MARKER, MB, StorageManager, StorageQuotaError
+
+DiskUsage = namedtuple("DiskUsage", "total used free")
+
+
+@pytest.fixture
+def disk(monkeypatch):
+    """Free space reported by ``shutil.disk_usage``, in bytes."""
+    state = {"free": 10_000 * MB}
+    monkeypatch.setattr(
+        storage_module.shutil, "disk_usage", lambda path: DiskUsage(0, 0, state["free"])
+    )
+    return state
+
+
+@pytest.fixture
+def make_storage(tmp_path, disk):
+    def build(**config: float) -> StorageManager:
+        return StorageManager(AppSettings(output_dir=tmp_path, storage=StorageConfig(**config)))
+
+    return build
+
+
+def _write(path: Path, size_mb: float, mtime: float) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0" * int(size_mb * MB))
+    os.utime(path, (mtime, mtime))
+    os.utime(path.parent, (mtime, mtime))
+    return path
+
+
+def test_hard_links_are_counted_once(make_storage, tmp_path):
+    storage = make_storage()
+    clip = _write(tmp_path / "run_a" / "burned.mp4", 2, 100)
+    os.link(clip, tmp_path / "final_a.mp4")
+    (tmp_path / "run_b").mkdir()
+    os.link(clip, tmp_path / "run_b" / "burned.mp4")
+    assert storage.usage()["total"] == 2 * MB
+
+
+def test_linked_copies_do_not_trigger_eviction(make_storage, tmp_path):
+    storage = make_storage(quota_mb=3, min_free_mb=0)
+    clip = _write(tmp_path / "run_a" / "burned.mp4", 2, 100)
+    os.link(clip, tmp_path / "final_a.mp4")
+    assert storage.admit_run(1 * MB) == []
+
+
+def test_evicting_one_link_frees_nothing(make_storage, tmp_path, disk):
+    storage = make_storage(min_free_mb=1)
+    disk["free"] = MB // 2
+    clip = _write(tmp_path / "run_a" / "burned.mp4", 3, 100)
+    os.link(clip, tmp_path / "final_a.mp4")
+    _write(tmp_path / "final_b.mp4", 2, 300)
+
+    # Free space only grows once both links to the clip are gone.
+    evicted = storage.evict()
+    assert set(evicted) == {tmp_path / "run_a", tmp_path / "final_a.mp4"}
+    assert (tmp_path / "final_b.mp4").exists()
+
+
+def test_kept_entries_are_never_evicted(make_storage, tmp_path):
+    storage = make_storage(quota_mb=3, min_free_mb=0)
+    _write(tmp_path / "run_parent" / "narrated.mp4", 2, 100)
+    _write(tmp_path / "final_b.mp4", 1, 200)
+
+    evicted = storage.admit_run(1 * MB, keep=[tmp_path / "run_parent"])
+    assert evicted == [tmp_path / "final_b.mp4"]
+    assert (tmp_path / "run_parent" / "narrated.mp4").exists()
+
+
+def test_eviction_is_least_recently_used_first(make_storage, tmp_path):
+    storage = make_storage(quota_mb=3, min_free_mb=0)
+    _write(tmp_path / "final_new.mp4", 1, 300)
+    _write(tmp_path / "run_old" / "narrated.mp4", 1, 100)
+    _write(tmp_path / "final_mid.mp4", 1, 200)
+
+    assert storage.evict(2 * MB) == [tmp_path / "run_old", tmp_path / "final_mid.mp4"]
+    assert (tmp_path / "final_new.mp4").exists()
+
+
+def test_touch_moves_an_entry_to_the_back(make_storage, tmp_path):
+    storage = make_storage(quota_mb=2, min_free_mb=0)
+    _write(tmp_path / "final_a.mp4", 1, 100)
+    _write(tmp_path / "final_b.mp4", 1, 200)
+    storage.touch(tmp_path / "final_a.mp4")
+
+    assert storage.evict(1 * MB) == [tmp_path / "final_b.mp4"]
+
+
+def test_active_and_hidden_entries_are_never_evicted(make_storage, tmp_path):
+    storage = make_storage(quota_mb=1, min_free_mb=0)
+    work_dir = storage.begin_run("live")
+    _write(work_dir / "stitched.mp4", 1, 100)
+    _write(tmp_path / ".governor.sqlite3", 1, 100)
+
+    assert storage.evict(1 * MB) == []
+    with pytest.raises(StorageQuotaError, match="quota"):
+        storage.admit_run(1 * MB)
+
+
+def test_admit_run_evicts_to_fit_the_quota(make_storage, tmp_path):
+    storage = make_storage(quota_mb=3, min_free_mb=0, run_reserve_mb=2)
+    _write(tmp_path / "final_a.mp4", 1, 100)
+    _write(tmp_path / "final_b.mp4", 1, 200)
+
+    assert storage.admit_run() == [tmp_path / "final_a.mp4"]
+
+
+def test_admit_run_rejects_a_reservation_larger_than_the_quota(make_storage):
+    storage = make_storage(quota_mb=1)
+    with pytest.raises(StorageQuotaError, match="exceeds"):
+        storage.admit_run(2 * MB)
+
+
+def test_admit_run_evicts_when_disk_is_low(make_storage, tmp_path, disk):
+    storage = make_storage(min_free_mb=2)
+    disk["free"] = 2 * MB
+    _write(tmp_path / "final_a.mp4", 1, 100)
+    # The fake disk does not grow as files are removed, so admission still fails.
+    with pytest.raises(StorageQuotaError, match="free disk"):
+        storage.admit_run(1 * MB)
+    assert not (tmp_path / "final_a.mp4").exists()
+
+
+def test_admit_run_with_enough_disk_evicts_nothing(make_storage, tmp_path, disk):
+    storage = make_storage(min_free_mb=2)
+    disk["free"] = 4 * MB
+    _write(tmp_path / "final_a.mp4", 1, 100)
+    assert storage.admit_run(1 * MB) == []
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _run_dir(tmp_path: Path, name: str, owner: str, age: float = 0.0) -> Path:
+    work_dir = tmp_path / f"run_{name}"
+    work_dir.mkdir()
+    marker = work_dir / ACTIVE_MARKER
+    marker.write_text(owner)
+    started = time.time() - age
+    os.utime(marker, (started, started))
+    return work_dir
+
+
+def test_runs_of_dead_owners_are_stale(make_storage, tmp_path):
+    storage = make_storage()
+    dead = _run_dir(tmp_path, "dead", f"{_dead_pid()}:1")
+    assert storage.cleanup_stale_runs() == [dead]
+
+
+def test_runs_of_a_crashed_process_with_our_pid_are_stale(make_storage, tmp_path):
+    # A restarted container often gets the crashed process's pid back.
+    storage = make_storage()
+    reused = _run_dir(tmp_path, "reused", f"{os.getpid()}:1")
+    legacy = _run_dir(tmp_path, "legacy", str(os.getpid()))
+    assert sorted(storage.cleanup_stale_runs()) == sorted([reused, legacy])
+
+
+def test_live_runs_are_kept_until_they_hang(make_storage, tmp_path):
+    storage = make_storage(stale_run_seconds=60)
+    ours = _run_dir(tmp_path, "ours", process_token())
+    parent = _run_dir(tmp_path, "parent", str(os.getppid()))
+    hung = _run_dir(tmp_path, "hung", process_token(), age=120)
+    kept = tmp_path / "run_kept"
+    kept.mkdir()  # finished runs kept for editing have no marker
+
+    assert storage.cleanup_stale_runs() == [hung]
+    assert ours.exists() and parent.exists() and kept.exists()
+
+
+def test_owner_alive_checks_the_start_time():
+    ppid = os.getppid()
+    start = process_start(ppid)
+    if start is None:
+        pytest.skip("needs /proc")
+    assert owner_alive(f"{ppid}:{start}")
+    assert not owner_alive(f"{ppid}:{int(start) + 1}")
+    assert owner_alive(process_token())
+    assert not owner_alive(f"{_dead_pid()}:{start}")
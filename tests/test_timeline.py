@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+from app.pipeline.schema import ShotPlan
+from app.pipeline.timeline import plan_timeline
+
+
+def _shots(*durations: float) -> List[ShotPlan]:
+    return [
+        ShotPlan(scene_number=idx, description=f"shot {idx}", duration=duration, prompt="p")
+        for idx, duration in enumerate(durations, start=1)
+    ]
+
+
+def test_scales_proportionally_to_target():
+    planned = plan_timeline(_shots(2.0, 4.0), 12.0)
+    assert [shot.duration for shot in planned] == [4.0, 8.0]
+
+
+def test_total_matches_target():
+    planned = plan_timeline(_shots(5.0, 7.0, 5.0), 9.3)
+    assert sum(shot.duration for shot in planned) == pytest.approx(9.3, abs=1e-2)
+
+
+def test_short_shots_lifted_to_floor_at_expense_of_long_ones():
+    planned = plan_timeline(_shots(0.1, 10.0), 5.0, min_shot=0.5)
+    assert [shot.duration for shot in planned] == [0.5, 4.5]
+
+
+def test_shots_beyond_target_are_dropped():
+    planned = plan_timeline(_shots(1.0, 1.0, 1.0, 1.0, 1.0), 1.2, min_shot=0.5)
+    assert [shot.scene_number for shot in planned] == [1, 2]
+    assert all(shot.duration >= 0.5 for shot in planned)
+
+
+def test_single_shot_kept_when_target_below_floor():
+    planned = plan_timeline(_shots(3.0, 3.0), 0.2, min_shot=0.5)
+    assert len(planned) == 1
+    assert planned[0].duration == 0.2
+
+
+def test_zero_durations_split_evenly():
+    planned = plan_timeline(_shots(0.0, 0.0, 0.0), 6.0)
+    assert [shot.duration for shot in planned] == [2.0, 2.0, 2.0]
+
+
+@pytest.mark.parametrize("target", [0.0, -1.0])
+def test_non_positive_target_leaves_plan_unchanged(target):
+    shots = _shots(2.0, 3.0)
+    assert plan_timeline(shots, target) == shots
+
+
+def test_other_fields_preserved():
+    shots = _shots(2.0)
+    planned = plan_timeline(shots, 4.0)
+    assert planned[0].prompt == shots[0].prompt and planned[0].description == shots[0].description
+    assert shots[0].duration == 2.0  # input not mutated
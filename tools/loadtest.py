@@ -0,0 +1,368 @@
+"""Load-test the workflow against local stubs for Ollama, the video API and TTS.
+
+Example::
+
+    python tools/loadtest.py --requests 40 --concurrency 8 --workers 4 \
+        --video-latency lognormal:6,0.5 --video-mode polling
+
+Stub servers run in this process. Worker processes import the real entry
+points (``run_workflow.handler`` or the Flask ``/generate`` view) with
+``load_settings`` pointed at the stubs via environment variables, so the full
+pipeline, including encodes, runs for every request.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from app.pipeline.providers import parse_latency  # noqa: E402
+
+
+@dataclass
+class ServiceProfile:
+    latency: Callable[[random.Random], float]
+    error_rate: float = 0.0
+
+
+@dataclass
+class StubState:
+    ollama: ServiceProfile
+    video: ServiceProfile
+    tts: ServiceProfile
+    video_mode: str
+    clip_bytes: bytes
+    wav_bytes: bytes
+    jobs: Dict[str, float] = field(default_factory=dict)
+    rng: random.Random = field(default_factory=random.Random)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def sample(self, profile: ServiceProfile) -> Tuple[float, bool]:
+        with self.lock:
+            return max(0.0, profile.latency(self.rng)), self.rng.random() < profile.error_rate
+
+
+def _make_wav(seconds: float, sample_rate: int = 22050) -> bytes:
+    import numpy as np
+
+    t = np.linspace(0, seconds, int(sample_rate * seconds), False)
+    samples = (0.2 * np.sin(2 * np.pi * 180 * t) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(sample_rate)
+        handle.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def _make_clip(seconds: float, scratch: Path) -> bytes:
+    from app.pipeline.schema import ShotPlan
+    from app.pipeline.video import _generate_demo_clip
+
+    shot = ShotPlan(scene_number=0, description="Load test clip", duration=seconds, prompt="")
+    return _generate_demo_clip(shot, scratch).read_bytes()
+
+
+def _ollama_reply(body: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = " ".join(message.get("content", "") for message in body.get("messages", []))
+    if "Concept to amplify" in prompt:
+        content = {
+            "script": "Stub narration for load testing. " * 4,
+            "captions": ["Stub caption one", "Stub caption two", "Stub caption three"],
+            "shots": [
+                {"scene_number": idx, "description": f"Stub shot {idx}", "prompt": f"stub {idx}", "duration_seconds": 5}
+                for idx in range(1, 4)
+            ],
+        }
+    else:
+        content = {
+            "angles": [
+                {"angle": f"Stub angle {idx}", "hook": f"Stub hook {idx}", "score": 60 + idx * 10}
+                for idx in range(3)
+            ]
+        }
+    return {"message": {"role": "assistant", "content": json.dumps(content)}, "done": True}
+
+
+def _make_handler(state: StubState) -> type:
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *_args: Any) -> None:
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, payload: Dict[str, Any]) -> None:
+            self._send(status, json.dumps(payload).encode())
+
+        def _delay(self, profile: ServiceProfile) -> bool:
+            """Sleep for a sampled latency; return True when an error should be injected."""
+            delay, fail = state.sample(profile)
+            time.sleep(delay)
+            if fail:
+                self._json(500, {"error": "injected failure"})
+            return fail
+
+        def _base_url(self) -> str:
+            host, port = self.server.server_address[:2]
+            return f"http://{host}:{port}"
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server API
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/api/chat":
+                if not self._delay(state.ollama):
+                    self._json(200, _ollama_reply(body))
+            elif self.path == "/video":
+                if state.video_mode == "polling":
+                    delay, fail = state.sample(state.video)
+                    job_id = uuid.uuid4().hex
+                    with state.lock:
+                        state.jobs[job_id] = -1.0 if fail else time.monotonic() + delay
+                    self._json(200, {"id": job_id, "status": "queued"})
+                elif not self._delay(state.video):
+                    self._json(200, {"video_url": f"{self._base_url()}/files/clip.mp4"})
+            elif self.path.startswith("/tts/"):
+                if not self._delay(state.tts):
+                    self._send(200, state.wav_bytes, "audio/wav")
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            if self.path == "/files/clip.mp4":
+                self._send(200, state.clip_bytes, "video/mp4")
+            elif self.path.startswith("/video/"):
+                with state.lock:
+                    ready_at = state.jobs.get(self.path.rsplit("/", 1)[-1])
+                if ready_at is None:
+                    self._json(404, {"error": "unknown job"})
+                elif ready_at < 0:
+                    self._json(200, {"status": "failed", "error": "injected failure"})
+                elif time.monotonic() < ready_at:
+                    self._json(200, {"status": "processing", "eta_seconds": round(ready_at - time.monotonic(), 2)})
+                else:
+                    self._json(200, {"status": "succeeded", "video_url": f"{self._base_url()}/files/clip.mp4"})
+            else:
+                self._json(404, {"error": "not found"})
+
+    return StubHandler
+
+
+def start_stubs(state: StubState, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, 0), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="aivid-stubs", daemon=True).start()
+    return server
+
+
+def configure_environment(base_url: str, output_dir: Path, video_mode: str) -> None:
+    """Point ``load_settings`` at the stub servers."""
+    os.environ.update(
+        {
+            "AIVID_DEMO_MODE": "false",
+            "AIVID_OUTPUT_DIR": output_dir.as_posix(),
+            "OLLAMA_BASE_URL": base_url,
+            "OLLAMA_MODEL": "stub",
+            "VIDEO_API_URL": f"{base_url}/video",
+            "VIDEO_API_KEY": "stub",
+            "AIVID_VIDEO_PROVIDER": "polling" if video_mode == "polling" else "pika",
+            "TTS_API_URL": f"{base_url}/tts",
+            "TTS_API_KEY": "stub",
+        }
+    )
+
+
+def _build_caller(target: str) -> Callable[[str], int]:
+    if target == "handler":
+        sys.path.append(str(PROJECT_ROOT / "netlify" / "functions"))
+        from run_workflow import handler
+
+        def call(prompt: str) -> int:
+            event = {"httpMethod": "POST", "body": json.dumps({"prompt": prompt})}
+            return handler(event, None)["statusCode"]
+
+        return call
+
+    from flask import Flask
+
+    from app.config import load_settings
+    from app.views import register_routes
+
+    app = Flask("app", root_path=str(PROJECT_ROOT / "app"))
+    app.config["APP_SETTINGS"] = load_settings()
+    register_routes(app)
+    client = app.test_client()
+
+    def call(prompt: str) -> int:
+        try:
+            return client.post("/generate", data={"prompt": prompt}).status_code
+        except Exception:
+            return 500
+
+    return call
+
+
+def _run_worker(target: str, count: int, threads: int) -> Dict[str, Any]:
+    call = _build_caller(target)
+    samples: List[Tuple[float, int]] = []
+    lock = threading.Lock()
+
+    def one(index: int) -> None:
+        started = time.perf_counter()
+        status = call(f"Load test prompt {os.getpid()}-{index} about morning routines.")
+        with lock:
+            samples.append((time.perf_counter() - started, status))
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(count)))
+    wall = time.perf_counter() - wall_start
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)  # ffmpeg encoders
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    return {
+        "pid": os.getpid(),
+        "samples": samples,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "max_rss_mb": own.ru_maxrss / 1024,
+        "children_max_rss_mb": children.ru_maxrss / 1024,
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(results: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    samples = [sample for result in results for sample in result["samples"]]
+    ok = [latency for latency, status in samples if status == 200]
+    statuses: Dict[str, int] = {}
+    for _latency, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "statuses": statuses,
+        "wall_s": round(wall, 2),
+        "throughput_rps": round(len(ok) / wall, 3) if wall else 0.0,
+        "latency_s": {
+            "p50": round(percentile(ok, 50), 3),
+            "p95": round(percentile(ok, 95), 3),
+            "p99": round(percentile(ok, 99), 3),
+        },
+        "workers": [
+            {
+                "pid": result["pid"],
+                "requests": len(result["samples"]),
+                "cpu_s": round(result["cpu_s"], 2),
+                "cpu_util": round(result["cpu_s"] / result["wall_s"], 2) if result["wall_s"] else 0.0,
+                "max_rss_mb": round(result["max_rss_mb"], 1),
+                "children_max_rss_mb": round(result["children_max_rss_mb"], 1),
+            }
+            for result in results
+        ],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=["handler", "flask"], default="handler")
+    parser.add_argument("--requests", type=int, default=20, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests across all workers")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes (function instances)")
+    parser.add_argument("--video-mode", choices=["sync", "polling"], default="sync")
+    for service, default in (("ollama", "lognormal:2,0.4"), ("video", "lognormal:8,0.5"), ("tts", "lognormal:1.5,0.3")):
+        parser.add_argument(f"--{service}-latency", default=default, help="fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+        parser.add_argument(f"--{service}-error-rate", type=float, default=0.0)
+    parser.add_argument("--clip-seconds", type=float, default=5.0)
+    parser.add_argument("--voice-seconds", type=float, default=12.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory with every run's outputs")
+    args = parser.parse_args(argv)
+
+    scratch = Path(tempfile.mkdtemp(prefix="aivid_loadtest_"))
+    server = None
+    try:
+        state = StubState(
+            ollama=ServiceProfile(parse_latency(args.ollama_latency), args.ollama_error_rate),
+            video=ServiceProfile(parse_latency(args.video_latency), args.video_error_rate),
+            tts=ServiceProfile(parse_latency(args.tts_latency), args.tts_error_rate),
+            video_mode=args.video_mode,
+            clip_bytes=_make_clip(args.clip_seconds, scratch),
+            wav_bytes=_make_wav(args.voice_seconds),
+            rng=random.Random(args.seed),
+        )
+        server = start_stubs(state)
+        host, port = server.server_address[:2]
+        configure_environment(f"http://{host}:{port}", scratch / "outputs", args.video_mode)
+
+        workers = max(1, min(args.workers, args.concurrency))
+        threads = max(1, args.concurrency // workers)
+        shares = [args.requests // workers + (1 if idx < args.requests % workers else 0) for idx in range(workers)]
+
+        # Fresh spawned processes, one task each, so rusage is per simulated instance.
+        context = multiprocessing.get_context("spawn")
+        started = time.perf_counter()
+        with context.Pool(processes=workers, maxtasksperchild=1) as pool:
+            results = pool.starmap(_run_worker, [(args.target, share, threads) for share in shares if share])
+    finally:
+        if server is not None:
+            server.shutdown()
+        if args.keep:
+            print(f"Run outputs kept in {scratch}", file=sys.stderr)
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+    report = summarize(results, time.perf_counter() - started)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        latency = report["latency_s"]
+        print(f"Requests: {report['requests']}  succeeded: {report['succeeded']}  statuses: {report['statuses']}")
+        print(f"Throughput: {report['throughput_rps']} req/s over {report['wall_s']} s")
+        print(f"Latency p50/p95/p99: {latency['p50']} / {latency['p95']} / {latency['p99']} s")
+        for worker in report["workers"]:
+            print(
+                f"  worker {worker['pid']}: {worker['requests']} req, cpu {worker['cpu_s']} s "
+                f"({worker['cpu_util']}x), rss {worker['max_rss_mb']} MB, ffmpeg rss {worker['children_max_rss_mb']} MB"
+            )
+    return report
+
+
+if __name__ == "__main__":
+    main()